@@ -8,97 +8,187 @@ This module intentionally keeps only what's needed now.
 """
 from __future__ import annotations
 
-from typing import Dict, Iterable, Optional, Tuple
+from typing import DefaultDict, Dict, Iterable, Optional, Tuple
+from collections import defaultdict
+import functools
+import itertools
 import os
 import re
+import sys
 import unicodedata
+import weakref
 import pandas as pd  # pyright: ignore[reportMissingImports]
 import openpyxl   # pyright: ignore[reportMissingModuleSource]
 from openpyxl import load_workbook, Workbook # pyright: ignore[reportMissingModuleSource]
 from openpyxl.styles import Alignment # pyright: ignore[reportMissingModuleSource]
+from openpyxl.cell.cell import Cell, MergedCell # pyright: ignore[reportMissingModuleSource]
 from openpyxl.utils import get_column_letter # pyright: ignore[reportMissingModuleSource]
 
 DATA_START_ROW = 3
+# Branch code ("Şube Kodu") and order note ("Sipariş Notu") are read only from the first
+# BRANCH_HEADER_LINES lines of an order CSV (the metadata block above the table, normally
+# 2-3 lines). Either line appearing later is ignored. Shared with shipment_oop.
+BRANCH_HEADER_LINES = 20
 
 # ----------------------------- Normalization -----------------------------
 
+# Use ord() to ensure Turkish characters are properly mapped
+_TR_TABLE = str.maketrans({
+    ord("ı"): "i", ord("ğ"): "g", ord("ş"): "s", ord("ö"): "o", ord("ç"): "c", ord("ü"): "u",
+    ord("İ"): "I", ord("Ğ"): "G", ord("Ş"): "S", ord("Ö"): "O", ord("Ç"): "C", ord("Ü"): "U",
+})
+_RE_PUNCT = re.compile(r"[^\w\s]")
+_RE_WS = re.compile(r"\s+")
+
+
 def normalize_text(s) -> str:
-    if s is None or (isinstance(s, float) and pd.isna(s)):
+    if isinstance(s, str):
+        # most calls: cell labels / product names straight into the cache
+        return _normalize_str(s)
+    if s is None or (isinstance(s, float) and s != s):
         return ""
-    s = str(s)
-    # Use ord() to ensure Turkish characters are properly mapped
-    tr = str.maketrans({
-        ord("ı"): "i", ord("ğ"): "g", ord("ş"): "s", ord("ö"): "o", ord("ç"): "c", ord("ü"): "u",
-        ord("İ"): "I", ord("Ğ"): "G", ord("Ş"): "S", ord("Ö"): "O", ord("Ç"): "C", ord("Ü"): "U",
-    })
-    s = s.translate(tr)
+    return _normalize_str(str(s))
+
+
+@functools.lru_cache(maxsize=65536)
+def _normalize_str(s: str) -> str:
+    # Same cell labels / product names are normalized many times per run
+    s = s.translate(_TR_TABLE)
     s = s.upper()
     s = s.replace("GOGUSLU", "GOGSU").replace("GOGSULU", "GOGSU")
     s = s.replace("HARMANDALI", "EFESUS")
     s = s.replace("AMASRA", "DADAYLI")
-    s = re.sub(r"[^\w\s]", "", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _RE_PUNCT.sub("", s)
+    # split()/join collapses whitespace runs and strips the ends (same as \s+ -> " " + strip), without a regex pass
+    return " ".join(s.split())
+
+
+def normalize_series(s: pd.Series) -> pd.Series:
+    """Column-wise normalize_text(str(v)) (same rules, one pass)."""
+    # map(str) rather than astype(str): newer pandas keeps NaN missing under astype(str)
+    s = s.map(str).astype(object).str.translate(_TR_TABLE).str.upper()
+    s = s.str.replace("GOGUSLU", "GOGSU", regex=False).str.replace("GOGSULU", "GOGSU", regex=False)
+    s = s.str.replace("HARMANDALI", "EFESUS", regex=False)
+    s = s.str.replace("AMASRA", "DADAYLI", regex=False)
+    s = s.str.replace(_RE_PUNCT, "", regex=True)
+    return s.str.replace(_RE_WS, " ", regex=True).str.strip()
+
+
+# Size patterns (checked on punctuation-preserving uppercase text), fused into
+# one alternation; precedence 35KG > 350GR > 150GR is applied over all hits.
+# 35KG: 1*3,5 | 1x3,5 | 1*3.5 | 3,5 KG | 3,50 KG | KL_3,5_KG (do NOT match bare 350)
+_RE_SIZE = re.compile(
+    r"(?P<K35>1\s*[\*Xx]\s*3[,\.]?5\b"
+    r"|\b3[,\.]?5\s*KG\b"
+    r"|\b3[,\.]50\s*KG\b"
+    r"|KL[\s_\-]*3[,\.]?5)"
+    r"|(?P<G350>\b350\s*(?:GR|G)\b)"
+    r"|(?P<G150>\b150\s*(?:GR|G)\b)"
+)
+_SIZE_BY_GROUP = (("K35", "35KG"), ("G350", "350GR"), ("G150", "150GR"))
+
+
+def _up_keep_punct(s) -> str:
+    if s is None:
+        return ""
+    s = str(s)
+    # NFKD is the identity on ASCII; only decompose when there is something to fold
+    # (e.g. full-width digits in '３５０ GR')
+    if not s.isascii():
+        try:
+            s = unicodedata.normalize("NFKD", s)
+        except Exception:
+            pass
+    s = s.translate(_TR_TABLE).upper()
+    s = s.replace(" ", " ")
     return s
 
 
+@functools.lru_cache(maxsize=4096)
 def size_from_stock_or_unit(stock_name: str, unit_text: str) -> Optional[str]:
-    # Preserve punctuation for size patterns like 1*3,50 and 350 GR
-    def up_keep_punct(s: str) -> str:
-        if s is None:
-            return ""
-        try:
-            s = unicodedata.normalize("NFKD", str(s))
-        except Exception:
-            s = str(s)
-        tr = str.maketrans({
-            "ı": "i", "ğ": "g", "ş": "s", "ö": "o", "ç": "c", "ü": "u",
-            "İ": "I", "Ğ": "G", "Ş": "S", "Ö": "O", "Ç": "C", "Ü": "U",
-        })
-        s = s.translate(tr).upper()
-        s = s.replace(" ", " ")
-        return s
-
-    upn_raw = up_keep_punct(stock_name)
-    upu_raw = up_keep_punct(unit_text)
-
-    # Helper checks
-    def is_35kg(s: str) -> bool:
-        # 1*3,5 | 1x3,5 | 1*3.5 | 3,5 KG | 3,50 KG | KL_3,5_KG (do NOT match bare 350)
-        if re.search(r"1\s*[\*Xx]\s*3[,\.]?5\b", s):
-            return True
-        if re.search(r"\b3[,\.]?5\s*KG\b", s):
-            return True
-        if re.search(r"\b3[,\.]50\s*KG\b", s):  # treat 3,50 KG as 3.5 KG, but not bare 350
-            return True
-        if re.search(r"KL[\s_\-]*3[,\.]?5", s):
-            return True
-        return False
+    # Preserve punctuation for size patterns like 1*3,50 and 350 GR.
+    # '|' never occurs in any pattern, so one scan over both texts is equivalent
+    # to scanning them separately.
+    text = _up_keep_punct(stock_name) + "|" + _up_keep_punct(unit_text)
+    hits = {m.lastgroup for m in _RE_SIZE.finditer(text)}
+    for group, size in _SIZE_BY_GROUP:
+        if group in hits:
+            return size
+    return None
 
-    def is_350gr(s: str) -> bool:
-        return re.search(r"\b350\s*(GR|G)\b", s) is not None
+# --------------------------- CSV Utilities ---------------------------
 
-    def is_150gr(s: str) -> bool:
-        return re.search(r"\b150\s*(GR|G)\b", s) is not None
+STOK_COL_CANDIDATES = ("STOK KODU", "STOKKODU", "KOD")
+MIKTAR_COL_CANDIDATES = ("MIKTAR", "MİKTAR", "ADET")
+GRUP_COL_CANDIDATES = ("GRUP", "KATEGORI", "KATEGORI ADI")
+_ORDER_COL_NEEDLES = tuple({normalize_text(c) for c in STOK_COL_CANDIDATES + MIKTAR_COL_CANDIDATES + GRUP_COL_CANDIDATES})
 
-    if is_35kg(upn_raw) or is_35kg(upu_raw):
-        return "35KG"
-    if is_350gr(upn_raw) or is_350gr(upu_raw):
-        return "350GR"
-    if is_150gr(upn_raw) or is_150gr(upu_raw):
-        return "150GR"
-    return None
 
-# --------------------------- CSV Utilities ---------------------------
+def order_columns(col) -> bool:
+    """usecols filter: keep only columns find_col could pick for stock/qty/group, plus Birim."""
+    if col in ("Birim", "BIRIM"):
+        return True
+    up = normalize_text(col)
+    return any(n in up for n in _ORDER_COL_NEEDLES)
+
+
+# Last parsed order CSV (all columns), keyed by (path, mtime, size): process_all runs the
+# Tatlı and Donuk flows on the same file back to back. One entry; process_all drops it
+# when done (clear_csv_cache).
+_CSV_CACHE: Dict[tuple, pd.DataFrame] = {}
+
 
-def read_csv(csv_path: str) -> pd.DataFrame:
+def clear_csv_cache() -> None:
+    _CSV_CACHE.clear()
+
+
+def read_csv(csv_path: str, usecols=None) -> pd.DataFrame:
+    """Order CSV as a DataFrame; `usecols` (callable or list) selects columns after parsing."""
+    key = None
+    if usecols is not None:
+        # only selected reads are shared: the selection below is a new frame, so the
+        # cached one never reaches (and is never mutated by) a caller
+        try:
+            st = os.stat(csv_path)
+            key = (os.path.abspath(csv_path), st.st_mtime_ns, st.st_size)
+        except OSError:
+            key = None
+    df = _CSV_CACHE.get(key) if key is not None else None
+    if df is None:
+        # Parse every column and select afterwards: with usecols pandas stops rejecting
+        # rows that have extra fields (e.g. an unquoted "3,5 KG"), and the shifted
+        # columns would be read as quantities instead of failing the file
+        try:
+            df = pd.read_csv(csv_path, encoding="utf-8", delimiter=",", header=2)
+        except Exception:
+            df = pd.read_csv(csv_path, encoding="utf-8", delimiter=",", header=0)
+        if key is not None:
+            _CSV_CACHE.clear()
+            _CSV_CACHE[key] = df
+    if usecols is None:
+        return df
+    return df[[c for c in df.columns if usecols(c)] if callable(usecols) else list(usecols)]
+
+
+def parse_qty(value) -> Optional[float]:
+    """CSV quantity as float (decimal comma accepted); None when it does not parse."""
+    # pandas already parsed numeric columns: float(x) equals the str() round-trip, without the text work
+    if isinstance(value, float) or (isinstance(value, int) and not isinstance(value, bool)):
+        return float(value)
     try:
-        return pd.read_csv(csv_path, encoding="utf-8", delimiter=",", header=2)
-    except Exception:
-        return pd.read_csv(csv_path, encoding="utf-8", delimiter=",", header=0)
+        return float(str(value).replace(",", "."))
+    except (TypeError, ValueError):
+        return None
 
 
-def find_col(df: pd.DataFrame, candidates: Iterable[str]) -> Optional[str]:
-    cols_up = {normalize_text(c): c for c in df.columns}
+def build_col_index(df: pd.DataFrame) -> Dict[str, str]:
+    """Map normalized column name -> original column name (build once, reuse in find_col)."""
+    return {normalize_text(c): c for c in df.columns}
+
+
+def find_col(df, candidates: Iterable[str]) -> Optional[str]:
+    """Find a column by candidate names. `df` may be a DataFrame or a build_col_index() result."""
+    cols_up = df if isinstance(df, dict) else build_col_index(df)
     for c in candidates:
         cc = normalize_text(c)
         if cc in cols_up:
@@ -134,17 +224,29 @@ def read_branch_from_file(csv_path: str) -> tuple[Optional[str], Optional[str]]:
     Returns:
         Tuple of (primary_branch, fallback_branch)
     """
+    # The branch header never changes for a given file: parse it once per (path, mtime, size)
+    try:
+        st = os.stat(csv_path)
+    except Exception:
+        return (None, None)
+    return _read_branch_cached(os.path.abspath(csv_path), st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=128)
+def _read_branch_cached(csv_path: str, mtime_ns: int, size: int) -> tuple[Optional[str], Optional[str]]:
+    """read_branch_from_file() body; mtime_ns/size only key the cache."""
     branch_code = None
     order_note = None
     
     try:
         with open(csv_path, encoding="utf-8") as f:
-            lines = f.readlines()
-            
-            # First pass: Extract branch code
-            for line in lines:
+            # Branch code / order note live in the metadata lines above the table;
+            # don't read the whole (possibly large) order body to find them.
+            # One pass: first branch-code line and first order-note line (Sipariş Notu);
+            # stop reading as soon as both are known
+            for line in itertools.islice(f, BRANCH_HEADER_LINES):
                 up = normalize_text(line)
-                if "SUBE" in up and ("KODU" in up or "ADI" in up):
+                if branch_code is None and "SUBE" in up and ("KODU" in up or "ADI" in up):
                     # Extract part after colon
                     part = line.split(":", 1)[-1] if ":" in line else line
                     part = part.strip()
@@ -155,15 +257,11 @@ def read_branch_from_file(csv_path: str) -> tuple[Optional[str], Optional[str]]:
                         part = part.split("-", 1)[-1]
                     part = part.strip()
                     branch_code = part
-                    break
-            
-            # Second pass: Check for order note (Sipariş Notu)
-            for line in lines:
-                up = normalize_text(line)
-                if "SIPARIS" in up and "NOTU" in up:
+                if order_note is None and "SIPARIS" in up and "NOTU" in up:
                     # Extract part after colon
                     note_part = line.split(":", 1)[-1] if ":" in line else ""
                     order_note = note_part.strip()
+                if branch_code is not None and order_note is not None:
                     break
             
             # Process branch code
@@ -186,7 +284,7 @@ def read_branch_from_file(csv_path: str) -> tuple[Optional[str], Optional[str]]:
                 
                 # Standard processing for non-Marmaris or when no order note match
                 # If parens exist, return (inner, outer) for priority matching
-                m = re.search(r"^([^(]+)\(([^)]+)\)$", branch_code)
+                m = _RE_BRANCH_OUTER_INNER.search(branch_code)
                 if m:
                     outer = m.group(1).strip()
                     inner = m.group(2).strip()
@@ -205,13 +303,139 @@ def read_branch_from_file(csv_path: str) -> tuple[Optional[str], Optional[str]]:
 
 # --------------------------- Excel helpers ---------------------------
 
-def master_cell(ws: openpyxl.worksheet.worksheet.Worksheet, r: int, c: int):
+# Per-worksheet merge index: (row, col) -> (min_row, min_col, max_row, max_col).
+# Built once per sheet so merge probes are dict lookups instead of a walk over
+# every merged range. The cache has no freshness check of its own: anything that
+# merges/unmerges the sheet must call invalidate_merge_index(ws) (unmerge_all and
+# merge_all do).
+_MERGE_INDEX_CACHE: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _merge_cache(ws: openpyxl.worksheet.worksheet.Worksheet):
+    cached = _MERGE_INDEX_CACHE.get(ws)
+    if cached is not None:
+        return cached
+    index: Dict[Tuple[int, int], Tuple[int, int, int, int]] = {}
+    bounds_list = []
     for mr in ws.merged_cells.ranges:
+        # bounds returns (min_col, min_row, max_col, max_row)
         min_col, min_row, max_col, max_row = mr.bounds
-        if min_row <= r <= max_row and min_col <= c <= max_col:
-            return ws.cell(row=min_row, column=min_col)
+        bounds = (min_row, min_col, max_row, max_col)
+        bounds_list.append(bounds)
+        for rr in range(min_row, max_row + 1):
+            for cc in range(min_col, max_col + 1):
+                index.setdefault((rr, cc), bounds)
+    cached = (index, tuple(bounds_list))
+    _MERGE_INDEX_CACHE[ws] = cached
+    return cached
+
+
+def merge_index(ws: openpyxl.worksheet.worksheet.Worksheet) -> Dict[Tuple[int, int], Tuple[int, int, int, int]]:
+    return _merge_cache(ws)[0]
+
+
+def merge_ranges(ws: openpyxl.worksheet.worksheet.Worksheet) -> Tuple[Tuple[int, int, int, int], ...]:
+    """All merged ranges as (min_row, min_col, max_row, max_col) tuples, materialized once per sheet."""
+    return _merge_cache(ws)[1]
+
+
+def invalidate_merge_index(ws: openpyxl.worksheet.worksheet.Worksheet) -> None:
+    _MERGE_INDEX_CACHE.pop(ws, None)
+
+
+def unmerge_all(ws: openpyxl.worksheet.worksheet.Worksheet) -> list:
+    """Unmerge every merged range of the sheet; returns the range strings for merge_all()."""
+    ranges = [str(cr) for cr in ws.merged_cells.ranges]
+    for r in ranges:
+        ws.unmerge_cells(r)
+    invalidate_merge_index(ws)
+    return ranges
+
+
+def merge_all(ws: openpyxl.worksheet.worksheet.Worksheet, ranges: Iterable[str]) -> None:
+    """Re-apply ranges returned by unmerge_all()."""
+    for r in ranges:
+        ws.merge_cells(r)
+    invalidate_merge_index(ws)
+
+
+def drop_blank_cells(wb: Workbook) -> None:
+    """Drop empty, unstyled cells from every sheet before saving.
+
+    Read sweeps (iter_rows, ws.cell probes) materialize a Cell for every visited
+    coordinate and the writer emits each one as an empty <c/>; they carry nothing.
+    """
+    for ws in wb.worksheets:
+        # ws._cells is openpyxl's private (row, col) -> Cell store; tests/test_drop_blank_cells.py
+        # locks in what the saved file keeps
+        cells = ws._cells
+        blank = [
+            key for key, c in cells.items()
+            if type(c) is Cell and c.value is None and not c.has_style
+            and c.hyperlink is None and c.comment is None
+        ]
+        for key in blank:
+            del cells[key]
+
+
+def sheet_values(ws: openpyxl.worksheet.worksheet.Worksheet, min_row: int, max_row: int, min_col: int, max_col: int) -> list:
+    """Read a rectangular block of cell values in one iter_rows sweep.
+
+    Returns a list of row tuples; block[r - min_row][c - min_col] is the value at (r, c).
+    Merged (non-master) cells read as None, same as ws.cell(...).value.
+    """
+    if max_row < min_row or max_col < min_col:
+        return []
+    return list(ws.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col, values_only=True))
+
+
+def master_cell(ws: openpyxl.worksheet.worksheet.Worksheet, r: int, c: int):
+    merged = merge_index(ws).get((r, c))
+    if merged:
+        return ws.cell(row=merged[0], column=merged[1])
     return ws.cell(row=r, column=c)
 
+# Sections to skip/ignore in the DONUK block (keep these to avoid section confusion).
+# Stored in normalize_text form since they are compared against normalized cell labels.
+_DONUK_SKIP_SECTIONS = frozenset(normalize_text(x) for x in (
+    "MAKARON", "PASTA", "DONDURMA", "CHEESECAKE", "CATAL", "ÇATAL",
+    "BOREK", "BÖREK", "TATLI", "KUNEFE", "SERBET", "TRILECE"
+))
+
+# Exact DONUK product labels to collect (matched by equality, so order does not matter)
+_DONUK_TARGET_PRODUCTS = frozenset({
+    "CITIR MANTI",
+    "MANTI",  # Plain MANTI - in different column (c=12) on same row as BOYOZ
+    "CEVIZLI TAHINLI BAKLAVA",
+    "SOGUK BAKLAVA",
+    "BOYOZ",
+    "PATATES",
+    "HAMBURGER KOFTE",
+    "HAMBURGER EKMEGI",  # Must be separate from HAMBURGER KOFTE
+    "TAVUK BUT",
+    "EKSI MAYALI TOST EKMEGI",
+    "ZERDECALLI TOST EKMEGI",
+})
+
+# Quantity already appended to a label, e.g. "CITIR MANTI    1"
+_RE_TRAILING_NUMBER = re.compile(r'\s+\d+\s*$')
+# Bracket characters stripped from product names before matching
+_RE_BRACKET_CHARS = re.compile(r"[\(\{\}\)]")
+# Text inside the first parentheses of a raw CSV name, e.g. "X (DONUK)" -> "DONUK"
+_RE_PAREN_INNER = re.compile(r"\(([^)]+)\)")
+# Branch code of the form "OUTER(INNER)"
+_RE_BRANCH_OUTER_INNER = re.compile(r"^([^(]+)\(([^)]+)\)$")
+
+
+@functools.lru_cache(maxsize=4096)
+def _donuk_label_key(orig_text: str) -> str:
+    """Normalized DONUK label with any trailing quantity removed ("" if blank)."""
+    up = normalize_text(orig_text)
+    if not up:
+        return ""
+    return _RE_TRAILING_NUMBER.sub('', up).strip()
+
+
 def locate_donuk_products_block(ws: openpyxl.worksheet.worksheet.Worksheet, min_c: int, max_c: int, branch_name: str, debug: bool = False) -> Dict[str, Tuple[int, int, str]]:
     """Locate frozen ('DONUK') products within branch span and build map for each variant.
     Uses simple text matching to find products, without scoring or variant handling.
@@ -227,39 +451,21 @@ def locate_donuk_products_block(ws: openpyxl.worksheet.worksheet.Worksheet, min_
         Dict mapping normalized variant text -> (row_index, column_index, original_text)
     """
     res: Dict[str, Tuple[int, int, str]] = {}
+    # ws.max_row / ws.max_column walk every stored cell; read them once
+    max_r, max_col = ws.max_row, ws.max_column
     
     # Use the provided branch span (min_c to max_c) as branch columns
     # These are already determined by find_branch_span earlier
     if debug:
         print(f"[DEBUG] Using branch span cols {min_c}-{max_c} for '{branch_name}'")
-        print(f"[DEBUG] Worksheet: '{ws.title}', max_row={ws.max_row}, max_column={ws.max_column}")
+        print(f"[DEBUG] Worksheet: '{ws.title}', max_row={max_r}, max_column={max_col}")
 
-    # Sections to skip/ignore (keep these to avoid section confusion)
-    skip_sections = {
-        "MAKARON", "PASTA", "DONDURMA", "CHEESECAKE", "CATAL", "ÇATAL", 
-        "BOREK", "BÖREK", "TATLI", "KUNEFE", "SERBET", "TRILECE"
-    }
-    
-    # Define exact products to collect (order matters - check longer names first)
-    target_products = [
-        "CITIR MANTI",
-        "MANTI",  # Plain MANTI - in different column (c=12) on same row as BOYOZ
-        "CEVIZLI TAHINLI BAKLAVA",  # Must check before "SOGUK BAKLAVA"
-        "SOGUK BAKLAVA",
-        "BOYOZ",
-        "PATATES",
-        "HAMBURGER KOFTE",
-        "HAMBURGER EKMEGI",  # Must be separate from HAMBURGER KOFTE
-        "TAVUK BUT",
-        "EKSI MAYALI TOST EKMEGI",
-        "ZERDECALLI TOST EKMEGI"
-    ]
-    
     # CRITICAL FIX: Find DONUK section header first to avoid matching products in wrong sections
     donuk_header_row = None
-    for r in range(1, min(ws.max_row + 1, 100)):
-        for c in range(1, min(ws.max_column + 1, 5)):  # Check first few columns for section headers
-            v = ws.cell(row=r, column=c).value
+    # Check first few columns for section headers
+    header_block = sheet_values(ws, 1, min(max_r, 99), 1, min(max_col, 4))
+    for r, row_vals in enumerate(header_block, start=1):
+        for v in row_vals:
             if not v or not isinstance(v, str):
                 continue
             up_v = normalize_text(v)
@@ -280,95 +486,55 @@ def locate_donuk_products_block(ws: openpyxl.worksheet.worksheet.Worksheet, min_
     
     # ONLY scan rows BELOW the DONUK header (and within reasonable range)
     scan_start_row = donuk_header_row + 1
-    scan_end_row = min(ws.max_row + 1, donuk_header_row + 50)  # Scan next 50 rows max
+    scan_end_row = min(max_r + 1, donuk_header_row + 50)  # Scan next 50 rows max
     
     if debug:
         print(f"[DEBUG] Scanning for DONUK products in rows {scan_start_row}-{scan_end_row}, cols {min_c}-{max_c}")
     
     # Look for products ONLY in branch columns (min_c to max_c)
-    for r in range(scan_start_row, scan_end_row):
-        for c in range(min_c, max_c + 1):
-            try:
-                # Safe cell value access - handle merged cells
-                cell = ws.cell(row=r, column=c)
-                v = cell.value
-            except AttributeError:
-                # MergedCell object - try to get master cell value
-                try:
-                    # Find master cell of this merged range
-                    for mr in ws.merged_cells.ranges:
-                        min_col, min_row, max_col, max_row = mr.bounds
-                        if min_row <= r <= max_row and min_col <= c <= max_col:
-                            v = ws.cell(row=min_row, column=min_col).value
-                            break
-                    else:
-                        v = None
-                except Exception:
-                    v = None
-            except Exception:
-                v = None
-                
+    product_block = sheet_values(ws, scan_start_row, scan_end_row - 1, min_c, max_c)
+    for r, row_vals in enumerate(product_block, start=scan_start_row):
+        for c, v in enumerate(row_vals, start=min_c):
             if not v or not isinstance(v, str):
                 continue
             
             orig_text = str(v).strip()
-            up = normalize_text(orig_text)
-            if not up:
-                continue
-            
             # Remove trailing numbers to handle cells that already have quantities
             # e.g., "CITIR MANTI    1" -> "CITIR MANTI"
-            up_clean = re.sub(r'\s+\d+\s*$', '', up).strip()
-
-            # Skip section headers to avoid confusion
-            skip_this = False
-            for section in skip_sections:
-                # Only skip if it's ONLY a section name, not part of product name
-                if up_clean == section:
-                    skip_this = True
-                    break
-            if skip_this:
+            up_clean = _donuk_label_key(orig_text)
+            if not up_clean:
                 continue
 
-            # Check for exact matches with target products (order matters!)
-            matched = False
-            for target in target_products:
-                if up_clean == target:
-                    # Skip if we already found this product (keep the first/leftmost occurrence)
-                    if target in res:
-                        continue
-                    
-                    # CRITICAL FIX: Skip horizontally-merged header cells
-                    # Product labels should be in single cells or vertically-merged cells only.
-                    # Horizontally-merged cells (spanning multiple columns) are typically headers.
-                    merge = is_merged_at(ws, r, c)
-                    if merge:
-                        master_r, master_c, max_merge_r, max_merge_c = merge
-                        # Check if this is a horizontal merge (spans multiple columns)
-                        if max_merge_c > master_c:
-                            # This is a horizontally-merged header cell, skip it
-                            if debug:
-                                print(f"[DEBUG] Skipping horizontally-merged header at r={r} c={c} for '{target}' (merge spans cols {master_c}-{max_merge_c})")
-                            continue
-                        # For vertically-merged cells: Keep the CURRENT row position (r)
-                        # This ensures each product in a vertical list gets its own row number
-                        # even if they share a merged cell horizontally
-                        cell = ws.cell(row=r, column=c)
-                    else:
-                        cell = ws.cell(row=r, column=c)
-                    
-                    # Store original text as-is (cleaning will happen during write)
-                    res[target] = (r, c, orig_text)
-                    
-                    if debug:
-                        print(f"[DEBUG] Found DONUK product '{target}' at r={r} c={c} text='{orig_text}'")
-                    
-                    matched = True
-                    break
-            
-            if matched:
+            # Skip section headers to avoid confusion (only a bare section name, not part of a product name)
+            if up_clean in _DONUK_SKIP_SECTIONS:
                 continue
-    
+
+            # Exact match with a target product; keep the first/leftmost occurrence
+            if up_clean not in _DONUK_TARGET_PRODUCTS or up_clean in res:
+                continue
+
+            # CRITICAL FIX: Skip horizontally-merged header cells
+            # Product labels should be in single cells or vertically-merged cells only.
+            # Horizontally-merged cells (spanning multiple columns) are typically headers.
+            merge = is_merged_at(ws, r, c)
+            if merge:
+                master_r, master_c, max_merge_r, max_merge_c = merge
+                # Check if this is a horizontal merge (spans multiple columns)
+                if max_merge_c > master_c:
+                    # This is a horizontally-merged header cell, skip it
+                    if debug:
+                        print(f"[DEBUG] Skipping horizontally-merged header at r={r} c={c} for '{up_clean}' (merge spans cols {master_c}-{max_merge_c})")
+                    continue
+                # For vertically-merged cells: Keep the CURRENT row position (r)
+                # This ensures each product in a vertical list gets its own row number
+                # even if they share a merged cell horizontally
+
+            # Store original text as-is (cleaning will happen during write)
+            res[up_clean] = (r, c, orig_text)
+
+            if debug:
+                print(f"[DEBUG] Found DONUK product '{up_clean}' at r={r} c={c} text='{orig_text}'")
+
     if debug:
         print(f"[DEBUG] locate_donuk_products_block for branch '{branch_name}' collected {len(res)} products: {list(res.keys())}")
     
@@ -389,7 +555,6 @@ def safe_write(ws: openpyxl.worksheet.worksheet.Worksheet, r: int, c: int, value
     cell = ws.cell(row=r, column=c)
     
     # Check if it's a MergedCell (read-only)
-    from openpyxl.cell.cell import MergedCell
     if isinstance(cell, MergedCell):
         # Find the merged range and write to master cell
         merged = is_merged_at(ws, r, c)
@@ -431,8 +596,7 @@ def find_branch_span(ws: openpyxl.worksheet.worksheet.Worksheet, branch_name: st
     all_matches = []
     
     # PASS 1: Check merged ranges (exact only)
-    for mr in ws.merged_cells.ranges:
-        min_col, min_row, max_col, max_row = mr.bounds
+    for min_row, min_col, max_row, max_col in merge_ranges(ws):
         v = ws.cell(row=min_row, column=min_col).value
         if not v:
             continue
@@ -440,24 +604,19 @@ def find_branch_span(ws: openpyxl.worksheet.worksheet.Worksheet, branch_name: st
         if vv == up:  # Exact match only
             all_matches.append(('exact_merge', min_col, max_col, min_row, min_col))
     
-    # PASS 2: Scan rows for unmerged cells (exact only)
-    for r in range(1, min(25, ws.max_row) + 1):
-        for c in range(1, ws.max_column + 1):
-            v = ws.cell(row=r, column=c).value
-            if not v:
-                continue
-            vv = normalize_text(v)
-            
-            # Skip if this cell is already covered by a merge
-            in_merge = False
-            for mr in ws.merged_cells.ranges:
-                min_col, min_row, max_col, max_row = mr.bounds
-                if min_row <= r <= max_row and min_col <= c <= max_col:
-                    in_merge = True
-                    break
-            
-            if not in_merge:
-                if vv == up:  # Exact match only
+    # A merge match always outranks a plain cell, except on İSTANBUL where the rightmost
+    # match of any kind wins; so outside İSTANBUL PASS 2 cannot change the result.
+    prefer_rightmost = bool(ws.title) and 'STANBUL' in ws.title.upper()
+    if not all_matches or prefer_rightmost:
+        # PASS 2: Scan rows for unmerged cells (exact only)
+        merges = merge_index(ws)
+        header_block = sheet_values(ws, 1, min(25, ws.max_row), 1, ws.max_column)
+        for r, row_vals in enumerate(header_block, start=1):
+            for c, v in enumerate(row_vals, start=1):
+                # Skip if this cell is already covered by a merge (PASS 1 handled it)
+                if not v or (r, c) in merges:
+                    continue
+                if normalize_text(v) == up:  # Exact match only
                     all_matches.append(('exact_cell', c, c, r, c))
     
     # All matches are now exact. Prioritize: merge > cell
@@ -471,7 +630,7 @@ def find_branch_span(ws: openpyxl.worksheet.worksheet.Worksheet, branch_name: st
         match_type, min_col, max_col, row, _ = all_matches[0]
         
         # For İSTANBUL sheet specifically, if we have multiple matches, prefer the rightmost
-        if ws.title and 'STANBUL' in ws.title.upper():
+        if prefer_rightmost:
             if len(all_matches) > 1:
                 # Take the rightmost match (highest column number)
                 match_type, min_col, max_col, row, _ = max(all_matches, key=lambda m: m[4])
@@ -481,12 +640,7 @@ def find_branch_span(ws: openpyxl.worksheet.worksheet.Worksheet, branch_name: st
     return None
 
 def is_merged_at(ws: openpyxl.worksheet.worksheet.Worksheet, r: int, c: int) -> Optional[Tuple[int, int, int, int]]:
-    for mr in ws.merged_cells.ranges:
-        # bounds returns (min_col, min_row, max_col, max_row)
-        min_col, min_row, max_col, max_row = mr.bounds
-        if min_row <= r <= max_row and min_col <= c <= max_col:
-            return (min_row, min_col, max_row, max_col)
-    return None
+    return merge_index(ws).get((r, c))
 
 def resolve_numeric_col(ws: openpyxl.worksheet.worksheet.Worksheet, r: int, c: int, min_c: int, max_c: int) -> int:
     """Resolve the final column for writing/clearing, handling merged cells.
@@ -558,6 +712,14 @@ def format_text_with_qty(text: str, qty) -> str:
     return f"{left} = {fmt_qty}"
 
 
+# Sona eklenmiş miktar birimleri: '4 SPT.', '2 KL.', '5 TEPSI', '3 KOLİ', '1 PKT' (birden çok tekrar dahil)
+_RE_QTY_UNIT_SUFFIX = re.compile(r"(\s*[0-9]+(?:[\.,][0-9]+)?\s*(?:SPT\.|KL\.|TEPSI|TEPSİ|KOLİ|KOLI|PKT\.?))+$", re.IGNORECASE)
+# Herhangi bir yerde miktar+birim içeren metin (temizlik için)
+_RE_QTY_UNIT_ANY = re.compile(r"\d+\s*(?:SPT\.|KL\.|TEPSI|TEPSİ|KOLİ|KOLI)", re.IGNORECASE)
+# "36" as a standalone token marks MONO pasta
+_RE_WORD_36 = re.compile(r"\b36\b")
+
+
 def clean_text_from_quantities(text: str) -> str:
 
     """Sadece sonuna eklenmiş miktar birimlerini (ör. '4 SPT.', '2 KL.', '5 TEPSI', '3 KOLİ') siler.
@@ -569,8 +731,7 @@ def clean_text_from_quantities(text: str) -> str:
 
     # Sadece sonuna eklenmiş miktar birimi kalıplarını sil (KOLİ/KOLI dahil)
     # Örnek: 'ÜRÜN ADI 4 SPT.' -> 'ÜRÜN ADI', 'DOSİDO 5 KOLİ' -> 'DOSİDO'
-    qty_unit_pattern = re.compile(r"(\s*[0-9]+(?:[\.,][0-9]+)?\s*(?:SPT\.|KL\.|TEPSI|TEPSİ|KOLİ|KOLI|PKT\.?))+$", re.IGNORECASE)
-    t = qty_unit_pattern.sub("", t).rstrip()
+    t = _RE_QTY_UNIT_SUFFIX.sub("", t).rstrip()
 
     return t.strip()
 
@@ -598,36 +759,40 @@ def append_text_with_space(text: str, qty, sep: str = "    ") -> str:
 
 def find_size_columns(ws: openpyxl.worksheet.worksheet.Worksheet, min_c: int, max_c: int, row_hint: int) -> Dict[str, Optional[int]]:
     sizes: Dict[str, Optional[int]] = {"35KG": None, "350GR": None, "150GR": None}
+    max_r, max_col = ws.max_row, ws.max_column
+    def master_if_merged(rr: int, cc: int) -> int:
+        """Return the master (leftmost) column of a merge, or the column itself if not merged.
+        
+        This ensures size columns point to writable cells, not merged cell edges.
+        """
+        merged = merge_index(ws).get((rr, cc))
+        if merged:
+            return merged[1]  # Return master (leftmost) column
+        return cc
     def scan_rows(r1: int, r2: int):
         # Scan within branch span, plus small margin (max 4 columns) for size headers
         c_start = max(1, min_c)
-        c_end = min(ws.max_column, max_c if max_c >= min_c else min_c)
+        c_end = min(max_col, max_c if max_c >= min_c else min_c)
         # Allow small expansion but respect max_c limit to avoid crossing into next branch
         # For single-column spans, add small margin (up to 4 cols) but cap at max_c + 4
-        if c_start == c_end and c_end < ws.max_column:
-            c_end = min(ws.max_column, c_end + 4, max_c + 4)  # Limit expansion
-        for r in range(max(1, r1), min(ws.max_row, r2) + 1):
-            for c in range(c_start, c_end + 1):
-                v = ws.cell(row=r, column=c).value
+        if c_start == c_end and c_end < max_col:
+            c_end = min(max_col, c_end + 4, max_c + 4)  # Limit expansion
+        block = sheet_values(ws, max(1, r1), min(max_r, r2), c_start, c_end)
+        for r, row_vals in enumerate(block, start=max(1, r1)):
+            for c, v in enumerate(row_vals, start=c_start):
                 if not v:
                     continue
                 s = normalize_text(v)
-                def master_if_merged(rr: int, cc: int) -> int:
-                    """Return the master (leftmost) column of a merge, or the column itself if not merged.
-                    
-                    This ensures size columns point to writable cells, not merged cell edges.
-                    """
-                    for mr in ws.merged_cells.ranges:
-                        min_col, min_row, max_col, max_row = mr.bounds
-                        if min_row <= rr <= max_row and min_col <= cc <= max_col:
-                            return min_col  # Return master (leftmost) column
-                    return cc
                 if ("3,5" in s or ("35" in s and "KG" in s)) and sizes["35KG"] is None:
                     sizes["35KG"] = master_if_merged(r, c)
-                if ("350" in s and ("GR" in s or "G" in s)) and sizes["350GR"] is None:
+                # "G" also covers "GR"
+                if "350" in s and "G" in s and sizes["350GR"] is None:
                     sizes["350GR"] = master_if_merged(r, c)
-                if ("150" in s and ("GR" in s or "G" in s)) and sizes["150GR"] is None:
+                if "150" in s and "G" in s and sizes["150GR"] is None:
                     sizes["150GR"] = master_if_merged(r, c)
+                if all(sizes.values()):
+                    # first hit per size wins; nothing left to fill
+                    return
     if row_hint:
         scan_rows(row_hint, row_hint + 3)
     if not all(sizes.values()):
@@ -642,10 +807,9 @@ def safe_cell_value(ws: openpyxl.worksheet.worksheet.Worksheet, r: int, c: int):
     except AttributeError:
         # MergedCell - find master cell
         try:
-            for mr in ws.merged_cells.ranges:
-                min_col, min_row, max_col, max_row = mr.bounds
-                if min_row <= r <= max_row and min_col <= c <= max_col:
-                    return ws.cell(row=min_row, column=min_col).value
+            merged = merge_index(ws).get((r, c))
+            if merged:
+                return ws.cell(row=merged[0], column=merged[1]).value
         except Exception:
             pass
         return None
@@ -659,10 +823,12 @@ def locate_dondurmalar_block(ws: openpyxl.worksheet.worksheet.Worksheet, min_c:
     """
     header_row = None
     pasta_cols = {"MONO": None, "KUCUK": None, "BUYUK": None}
-    all_pasta_rows = []  # Pasta başlıkları için tüm satırları tut
+    pasta_header = False  # DONDURMALAR row that also names pasta types
+    max_r = ws.max_row
 
-    for r in range(1, min(ws.max_row, 100) + 1):
-        v = safe_cell_value(ws, r, 1)
+    # Last DONDURMALAR row wins, unless a DONDURMALAR row also mentions pasta: take that one and stop
+    col_a = ws.iter_rows(min_row=1, max_row=min(max_r, 100), min_col=1, max_col=1, values_only=True)
+    for r, (v,) in enumerate(col_a, start=1):
         if not v:
             continue
         up = normalize_text(v)
@@ -673,65 +839,43 @@ def locate_dondurmalar_block(ws: openpyxl.worksheet.worksheet.Worksheet, min_c:
                 print(f"[DEBUG] Found DONDURMALAR header at row {r}")
             header_row = r
             if ("PASTA" in up or "KROKAN" in up or "ORMAN" in up or "GANAJ" in up or "ANANAS" in up or "FISTIK" in up):
-                all_pasta_rows.append(r)
                 if debug:
                     print(f"[DEBUG] Found potential pasta row at {r}: '{v}'")
+                pasta_header = True
+                break
 
-        if all_pasta_rows:
-            # En üstteki pasta satırı
-            first_pasta_row = min(all_pasta_rows)
-            # Bu satırdan önceki 2 satırı kontrol et - MONO/KÜÇÜK/BÜYÜK başlıkları burada olmalı
-            for r in range(max(1, first_pasta_row - 2), first_pasta_row + 1):
-                for c in range(min_c, max_c + 1):
-                    v = safe_cell_value(ws, r, c)
-                    if not v:
-                        continue
-                    up = normalize_text(v)
+    if pasta_header:
+        # Pasta kolonları için özel kontrol: header row ve önceki 3 satır
+        check_rows = list(range(max(1, header_row - 3), header_row + 1))
+        if debug:
+            print(f"[DEBUG] Checking rows {check_rows} for pasta columns in cols {min_c}-{max_c}")
+        check_block = sheet_values(ws, check_rows[0], check_rows[-1], min_c, max_c)
+        for rr, row_vals in enumerate(check_block, start=check_rows[0]):
+            for c, v in enumerate(row_vals, start=min_c):
+                if not v:
+                    continue
+                up = normalize_text(v)
+                if debug:
+                    print(f"[DEBUG] Checking cell r={rr} c={c}: '{v}' -> '{up}'")
+                if "PASTA" not in up:
+                    continue
+                # Later hits overwrite earlier ones, so the whole window is scanned
+                if "MONO" in up or "TEK" in up:
+                    pasta_cols["MONO"] = c
                     if debug:
-                        print(f"[DEBUG] Checking potential pasta header cell r={r} c={c}: '{v}' -> '{up}'")
-                    # Daha esnek başlık eşleştirme
-                    if "MONO" in up or "TEK" in up or "36" in up:
-                        pasta_cols["MONO"] = c
-                        if debug:
-                            print(f"[DEBUG] Found MONO pasta column at r={r} c={c}")
-                    elif ("KUCUK" in up or "KÜÇÜK" in up):
-                        pasta_cols["KUCUK"] = c
-                        if debug:
-                            print(f"[DEBUG] Found KUCUK pasta column at r={r} c={c}")
-                    elif ("BUYUK" in up or "BÜYÜK" in up):
-                        pasta_cols["BUYUK"] = c
-                        if debug:
-                            print(f"[DEBUG] Found BUYUK pasta column at r={r} c={c}")
-            # Pasta kolonları için özel kontrol: header row ve önceki 3 satır
-            pasta_cols = {"MONO": None, "KUCUK": None, "BUYUK": None}
-            check_rows = list(range(max(1, header_row - 3), header_row + 1))
-            if debug:
-                print(f"[DEBUG] Checking rows {check_rows} for pasta columns in cols {min_c}-{max_c}")
-            for rr in check_rows:
-                for c in range(min_c, max_c + 1):
-                    v = safe_cell_value(ws, rr, c)
-                    if not v:
-                        continue
-                    up = normalize_text(v)
+                        print(f"[DEBUG] Found MONO pasta column at r={rr} c={c}")
+                elif "KUCUK" in up or "KÜÇÜK" in up:
+                    pasta_cols["KUCUK"] = c
                     if debug:
-                        print(f"[DEBUG] Checking cell r={rr} c={c}: '{v}' -> '{up}'")
-                    if ("MONO" in up or "TEK" in up) and "PASTA" in up:
-                        pasta_cols["MONO"] = c
-                        if debug:
-                            print(f"[DEBUG] Found MONO pasta column at r={rr} c={c}")
-                    elif ("KUCUK" in up or "KÜÇÜK" in up) and "PASTA" in up:
-                        pasta_cols["KUCUK"] = c
-                        if debug:
-                            print(f"[DEBUG] Found KUCUK pasta column at r={rr} c={c}")
-                    elif ("BUYUK" in up or "BÜYÜK" in up) and "PASTA" in up:
-                        pasta_cols["BUYUK"] = c
-                        if debug:
-                            print(f"[DEBUG] Found BUYUK pasta column at r={rr} c={c}")
-            break
+                        print(f"[DEBUG] Found KUCUK pasta column at r={rr} c={c}")
+                elif "BUYUK" in up or "BÜYÜK" in up:
+                    pasta_cols["BUYUK"] = c
+                    if debug:
+                        print(f"[DEBUG] Found BUYUK pasta column at r={rr} c={c}")
     
     if header_row is None:
         # Fallback: use given row_hint area
-        header_row = max(1, min(10, ws.max_row))
+        header_row = max(1, min(10, max_r))
         if debug:
             print(f"[DEBUG] Using fallback header row {header_row}")
     
@@ -747,6 +891,12 @@ def locate_dondurmalar_block(ws: openpyxl.worksheet.worksheet.Worksheet, min_c:
     return header_row, all_cols
 
 
+@functools.lru_cache(maxsize=1024)
+def _makaron_label_forms(orig_text: str) -> Tuple[str, str]:
+    """(normalized, quantity-free original) for a MAKARON variant cell."""
+    return normalize_text(orig_text), clean_text_from_quantities(orig_text)
+
+
 def locate_makaron_block(ws: openpyxl.worksheet.worksheet.Worksheet, min_c: int, max_c: int, debug: bool = False) -> Dict[str, Tuple[int, int, str]]:
     """Locate the MAKARON header within the branch span and collect all variants beneath it.
     
@@ -764,9 +914,9 @@ def locate_makaron_block(ws: openpyxl.worksheet.worksheet.Worksheet, min_c: int,
     header_r = None
     header_c = None
     # find MAKARON header within branch span in first 100 rows
-    for r in range(1, min(100, ws.max_row) + 1):
-        for c in range(min_c, max_c + 1):  # Only scan within branch span
-            v = safe_cell_value(ws, r, c)
+    header_block = sheet_values(ws, 1, min(100, ws.max_row), min_c, max_c)  # Only scan within branch span
+    for r, row_vals in enumerate(header_block, start=1):
+        for c, v in enumerate(row_vals, start=min_c):
             if not v:
                 continue
             if normalize_text(v) == "MAKARON":
@@ -796,37 +946,45 @@ def locate_makaron_block(ws: openpyxl.worksheet.worksheet.Worksheet, min_c: int,
     if debug:
         print(f"[DEBUG] Scanning for variants in rows {variant_rows} cols {variant_cols}")
     
+    merges = merge_index(ws)
+    r0, c0 = variant_rows[0], min_c
+    grid = sheet_values(ws, r0, variant_rows[-1], c0, min_c + len(variant_cols) - 1)
+
+    def value_at(rr: int, cc: int):
+        # grid covers the 3 x N block; a merge master may sit above/left of it
+        if r0 <= rr <= variant_rows[-1] and c0 <= cc < c0 + len(variant_cols):
+            return grid[rr - r0][cc - c0]
+        return ws.cell(row=rr, column=cc).value
+
     for r in variant_rows:
         for c in variant_cols:
             # If this cell is part of a merge, get its master
-            merge = is_merged_at(ws, r, c)
+            merge = merges.get((r, c))
             if merge:
                 master_r, master_c, _, _ = merge
                 if (master_r, master_c) in seen:
                     continue
                 seen.add((master_r, master_c))
-                cell = ws.cell(row=master_r, column=master_c)
+                v = value_at(master_r, master_c)
             else:
                 if (r, c) in seen:
                     continue
                 seen.add((r, c))
-                cell = ws.cell(row=r, column=c)
+                v = grid[r - r0][c - c0]
             
-            if not cell.value:
+            if not v:
                 continue
             
             # Keep original text for format: "variant = qty" - clean any existing qty/unit
-            orig_text = str(cell.value).strip()
+            orig_text = str(v).strip()
             if not orig_text:
                 continue
             
-            up = normalize_text(orig_text)
+            # Normalized key + original text cleaned from any accumulated quantities
+            up, clean_orig_text = _makaron_label_forms(orig_text)
             if not up:
                 continue
             
-            # Clean the original text from any accumulated quantities
-            clean_orig_text = clean_text_from_quantities(orig_text)
-            
             # Store row, column, and cleaned original text
             res[up] = (r, c, clean_orig_text)
             if debug:
@@ -837,6 +995,16 @@ def locate_makaron_block(ws: openpyxl.worksheet.worksheet.Worksheet, min_c: int,
         print(f"[DEBUG] locate_makaron_block collected {len(res)} variants: {list(res.keys())}")
     return res
 
+# Row-label needles for find_pasta_rows, in precedence order
+_PASTA_ROW_KEYS = (
+    ("KROKANLI", ("KROKANLI", "KROKAN")),
+    ("FISTIKLI", ("FISTIKLI", "FISTIK", "ANTEP")),
+    ("ORMAN", ("ORMAN",)),
+    ("GANAJ", ("GANAJ", "GANAJLI")),
+    ("ANANAS", ("ANANAS", "ANANASLI")),
+)
+
+
 def find_pasta_rows(ws: openpyxl.worksheet.worksheet.Worksheet, base_col: int, start_row: int, debug: bool = False) -> Dict[str, Optional[int]]:
     """Find pasta product rows in worksheet by scanning the branch's first column (base_col).
 
@@ -854,34 +1022,25 @@ def find_pasta_rows(ws: openpyxl.worksheet.worksheet.Worksheet, base_col: int, s
 
     # scan a reasonable range below the header (e.g., next 30 rows) or until worksheet end
     max_scan = min(ws.max_row, start_row + 60)
-    for r in range(start_row + 1, max_scan + 1):
-        v = ws.cell(row=r, column=base_col).value
+    remaining = len(targets)
+    col_vals = ws.iter_rows(min_row=start_row + 1, max_row=max_scan, min_col=base_col, max_col=base_col, values_only=True)
+    for r, (v,) in enumerate(col_vals, start=start_row + 1):
         if not v:
             continue
         up = normalize_text(v)
         if debug:
             print(f"[DEBUG] Checking row {r} col {base_col} for pasta: '{v}' -> '{up}'")
 
-        if ("KROKANLI" in up or "KROKAN" in up) and targets["KROKANLI"] is None:
-            targets["KROKANLI"] = r
-            if debug:
-                print(f"[DEBUG] Found KROKANLI pasta at row {r}")
-        elif ("FISTIKLI" in up or "FISTIK" in up or "ANTEP" in up) and targets["FISTIKLI"] is None:
-            targets["FISTIKLI"] = r
-            if debug:
-                print(f"[DEBUG] Found FISTIKLI pasta at row {r}")
-        elif ("ORMAN" in up or ("MEYVELI" in up and "ORMAN" in up)) and targets["ORMAN"] is None:
-            targets["ORMAN"] = r
-            if debug:
-                print(f"[DEBUG] Found ORMAN MEYVELI pasta at row {r}")
-        elif ("GANAJ" in up or "GANAJLI" in up) and targets["GANAJ"] is None:
-            targets["GANAJ"] = r
-            if debug:
-                print(f"[DEBUG] Found GANAJ pasta at row {r}")
-        elif ("ANANAS" in up or "ANANASLI" in up) and targets["ANANAS"] is None:
-            targets["ANANAS"] = r
-            if debug:
-                print(f"[DEBUG] Found ANANAS pasta at row {r}")
+        # First still-unassigned key whose needles hit wins (same as the old elif chain)
+        for key, needles in _PASTA_ROW_KEYS:
+            if targets[key] is None and any(n in up for n in needles):
+                targets[key] = r
+                remaining -= 1
+                if debug:
+                    print(f"[DEBUG] Found {'ORMAN MEYVELI' if key == 'ORMAN' else key} pasta at row {r}")
+                break
+        if remaining == 0:
+            break
 
     if debug:
         print(f"[DEBUG] Found pasta rows: {targets}")
@@ -891,15 +1050,19 @@ def find_pasta_rows(ws: openpyxl.worksheet.worksheet.Worksheet, base_col: int, s
 
     return targets
 
+_PASTA_TESTS = (
+    ("KROKANLI", ("KROKAN",)),
+    ("FISTIKLI", ("FISTIK",)),
+    ("ORMAN", ("ORMAN", "MEYVELI")),
+    ("GANAJ", ("GANAJ",)),
+    ("ANANAS", ("ANANAS",)),
+)
+
+
+@functools.lru_cache(maxsize=4096)
 def pasta_key_from_name(name_up: str) -> str:
-    tests = [
-        ("KROKANLI", ["KROKAN"]),
-        ("FISTIKLI", ["FISTIK"]),
-        ("ORMAN", ["ORMAN", "MEYVELI"]),
-        ("GANAJ", ["GANAJ"]),
-        ("ANANAS", ["ANANAS"])
-    ]
-    for key, needles in tests:
+    # Needles are stems (KROKAN -> KROKANLI), so they stay substring tests; cached per distinct name
+    for key, needles in _PASTA_TESTS:
         if any(n in name_up for n in needles):
             return key
     return ""
@@ -909,44 +1072,56 @@ def pasta_key_from_name(name_up: str) -> str:
 def find_group_header_rows(ws: openpyxl.worksheet.worksheet.Worksheet, groups: Iterable[str]) -> Dict[str, int]:
     res: Dict[str, int] = {}
     wanted = {normalize_text(g): g for g in groups}
-    for r in range(1, ws.max_row + 1):
-        v = ws.cell(row=r, column=1).value
+    n_wanted = len(set(wanted.values()))
+    for r, (v,) in enumerate(ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=1, values_only=True), start=1):
         if not v:
             continue
         up = normalize_text(v)
         if up in wanted and wanted[up] not in res:
             res[wanted[up]] = r
+            # Only the first row per group is kept, so stop once all are found
+            if len(res) == n_wanted:
+                break
     return res
 
 
+# Size-like headers / section labels that are never matrix variants
+_RE_VARIANT_SKIP = re.compile(r"3,5|350|150|KG|GR|DONDURMALAR")
+_RE_HAS_ALPHA = re.compile(r"[A-Z]")
+
+
 def scan_variant_columns(ws: openpyxl.worksheet.worksheet.Worksheet, header_row: int, min_c: int, max_c: int) -> Tuple[Dict[str, int], int]:
     """Scan for variant headers on the given header row or the immediate next row.
     Returns (variants_map, row_used).
     """
+    max_r = ws.max_row
+    c_start = max(1, min_c)
+    c_end = min(ws.max_column, max(max_c, min_c) + 12)
+
+    merges = merge_index(ws)  # read-only scan: one index for every probe
+
+    def rightmost(rr: int, cc: int) -> int:
+        merged = merges.get((rr, cc))
+        if merged:
+            return merged[3]
+        return cc
+
     def scan_on_row(row_idx: int) -> Dict[str, int]:
         variants: Dict[str, int] = {}
-        c_start = max(1, min_c)
-        c_end = min(ws.max_column, max(max_c, min_c) + 12)
-        for c in range(c_start, c_end + 1):
-            v = ws.cell(row=row_idx, column=c).value
+        row_vals = sheet_values(ws, row_idx, row_idx, c_start, c_end)
+        for c, v in enumerate(row_vals[0] if row_vals else (), start=c_start):
             if not v:
                 continue
             up = normalize_text(v)
-            if not up or any(k in up for k in ["3,5", "350", "150", "KG", "GR", "DONDURMALAR"]):
+            if not up or _RE_VARIANT_SKIP.search(up):
                 # Skip size-like headers or section labels
                 continue
             # Skip pure numbers or tokens without letters (e.g., '2')
-            if not re.search(r"[A-Z]", up):
+            if not _RE_HAS_ALPHA.search(up):
                 continue
             if len(up) <= 2:
                 continue
             # rightmost if merged
-            def rightmost(rr: int, cc: int) -> int:
-                for mr in ws.merged_cells.ranges:
-                    min_col, min_row, max_col, max_row = mr.bounds
-                    if min_row <= rr <= max_row and min_col <= cc <= max_col:
-                        return max_col
-                return cc
             col = rightmost(row_idx, c)
             variants[up] = col
         return variants
@@ -955,27 +1130,33 @@ def scan_variant_columns(ws: openpyxl.worksheet.worksheet.Worksheet, header_row:
     v_now = scan_on_row(header_row)
     if v_now:
         return v_now, header_row
-    if header_row + 1 <= ws.max_row:
+    if header_row + 1 <= max_r:
         v_next = scan_on_row(header_row + 1)
         if v_next:
             return v_next, header_row + 1
-    if header_row + 2 <= ws.max_row:
+    if header_row + 2 <= max_r:
         v_next2 = scan_on_row(header_row + 2)
         if v_next2:
             return v_next2, header_row + 2
     return {}, header_row
 
 
+# Group headers that end a product row scan (normalized)
+_PRODUCT_ROW_STOP_SECTIONS = frozenset(normalize_text(x) for x in (
+    "DONDURMALAR", "TOST", "EKMEK", "CHEESECAKE", "CATAL BOREK", "ÇATAL BÖREK"
+))
+
+
 def scan_product_rows(ws: openpyxl.worksheet.worksheet.Worksheet, start_row: int, stop_row: int) -> Dict[int, str]:
     rows: Dict[int, str] = {}
-    for r in range(start_row, min(ws.max_row, stop_row)):
-        v = ws.cell(row=r, column=1).value
-        if v is None or str(v).strip() == "":
-            # allow anonymous block row
+    col_a = sheet_values(ws, start_row, min(ws.max_row, stop_row) - 1, 1, 1)
+    for r, (v,) in enumerate(col_a, start=start_row):
+        if v is None or (isinstance(v, str) and not v.strip()):
+            # allow anonymous block row (non-string values never stringify to blank)
             continue
         up = normalize_text(v)
         # Skip section headers (another group name)
-        if up in {"DONDURMALAR", "TOST", "EKMEK", "CHEESECAKE", "CATAL BOREK", "ÇATAL BÖREK"}:
+        if up in _PRODUCT_ROW_STOP_SECTIONS:
             break
         rows[r] = up
         # Heuristic: stop collecting after hitting an empty line following content
@@ -988,8 +1169,9 @@ def scan_product_rows(ws: openpyxl.worksheet.worksheet.Worksheet, start_row: int
 def build_blocks(ws: openpyxl.worksheet.worksheet.Worksheet, min_c: int, max_c: int) -> list:
     groups = ["TOST", "EKMEK", "CHEESECAKE", "ÇATAL BÖREK", "CATAL BOREK"]
     hdrs = find_group_header_rows(ws, groups)
+    max_r = ws.max_row  # computed from the cell store on every access; read once
     # Determine the next header row to bound product rows
-    hdr_positions = sorted(hdrs.values()) + [ws.max_row + 1]
+    hdr_positions = sorted(hdrs.values()) + [max_r + 1]
     blocks = []
     for gname, r in hdrs.items():
         # find next header below r
@@ -1001,7 +1183,7 @@ def build_blocks(ws: openpyxl.worksheet.worksheet.Worksheet, min_c: int, max_c:
         variants, used_row = scan_variant_columns(ws, r, min_c, max_c)
         # start products below the variant header row (used_row); default r+1
         start_products = (used_row + 1) if variants else (r + 1)
-        prows = scan_product_rows(ws, start_products, next_r if next_r is not None else ws.max_row + 1)
+        prows = scan_product_rows(ws, start_products, next_r if next_r is not None else max_r + 1)
         if variants:
             blocks.append({
                 "group": gname,
@@ -1013,6 +1195,23 @@ def build_blocks(ws: openpyxl.worksheet.worksheet.Worksheet, min_c: int, max_c:
     return blocks
 
 
+# Groups handled outside the DONUK block, with the name keywords that place a product in them
+_SPECIFIC_GROUPS = {
+    "MUTFAK": ("SOSLU TAVUK", "KOFTE", "KÖFTE", "HAMBURGER"),
+    "TOST": ("TOST",),
+    "EKMEK": ("EKMEK",),
+    "CHEESECAKE": ("CHEESECAKE", "TRILECE", "TRILEÇE"),
+    "BOREK": ("BÖREK", "BOREK", "CATAL", "ÇATAL", "KOL BOREGI", "SU BOREGI"),
+    "TATLI": ("BAKLAVA", "TATLI", "KÜNEFE", "KUNEFE"),
+    "PASTA": ("PASTA",),
+    "DONDURMA": ("DONDURMA", "ROKOKO"),
+}
+# One alternation over every keyword: a single search instead of a substring test per keyword
+_RE_SPECIFIC_GROUP_KEYWORD = re.compile("|".join(
+    re.escape(kw) for keywords in _SPECIFIC_GROUPS.values() for kw in keywords
+))
+
+
 def is_specific_group_product(name_up: str, group_up: str = "") -> bool:
     """Check if a product belongs to a specific group (TOST, EKMEK, etc.) that should be handled separately.
     
@@ -1023,35 +1222,28 @@ def is_specific_group_product(name_up: str, group_up: str = "") -> bool:
     Returns:
         bool: True if product belongs to a specific other group
     """
-    specific_groups = {
-        "MUTFAK": ["SOSLU TAVUK", "KOFTE", "KÖFTE", "HAMBURGER"],
-        "TOST": ["TOST"],
-        "EKMEK": ["EKMEK"],
-        "CHEESECAKE": ["CHEESECAKE", "TRILECE", "TRILEÇE"],
-        "BOREK": ["BÖREK", "BOREK", "CATAL", "ÇATAL", "KOL BOREGI", "SU BOREGI"],
-        "TATLI": ["BAKLAVA", "TATLI", "KÜNEFE", "KUNEFE"],
-        "PASTA": ["PASTA"],
-        "DONDURMA": ["DONDURMA", "ROKOKO"]
-        }
-    
-        # If product belongs to a specific group by CSV group column
-    if group_up in specific_groups:
+    # If product belongs to a specific group by CSV group column
+    if group_up in _SPECIFIC_GROUPS:
         return True
     
-    # Check product name against specific group keywords
-    for group, keywords in specific_groups.items():
-        if any(kw in name_up for kw in keywords):
-            # Exception: if it's explicitly a DONUK/frozen product
-            if "DONUK" in name_up or "CITIR MANTI" in name_up or "ÇITIR MANTI" in name_up or "BOYOZ" in name_up:
-                return False
-            return True
+    # Check product name against specific group keywords (any group; which one does not matter)
+    if _RE_SPECIFIC_GROUP_KEYWORD.search(name_up):
+        # Exception: if it's explicitly a DONUK/frozen product
+        if "DONUK" in name_up or "CITIR MANTI" in name_up or "ÇITIR MANTI" in name_up or "BOYOZ" in name_up:
+            return False
+        return True
     return False
 
+# route_group_for_name keywords, checked in order ("CHEESE" already covers CHEESECAKE)
+_ROUTE_CHEESECAKE_KEYS = ("CHEESE", "TRILECE")
+_ROUTE_BOREK_KEYS = ("BOREK", "BÖREK", "CATAL", "ÇATAL", "KOL BOREGI", "SU BOREGI", "ISPANAKLI", "PATATESLI", "KIYMALI")
+
+
 def route_group_for_name(name_up: str) -> Optional[str]:
     """Route CSV row name to a target block group by keywords."""
-    if any(k in name_up for k in ["CHEESE", "CHEESECAKE", "TRILECE", "TRILECE"]):
+    if any(k in name_up for k in _ROUTE_CHEESECAKE_KEYS):
         return "CHEESECAKE"
-    if any(k in name_up for k in ["BOREK", "BÖREK", "CATAL", "ÇATAL", "KOL BOREGI", "SU BOREGI", "ISPANAKLI", "PATATESLI", "KIYMALI"]):
+    if any(k in name_up for k in _ROUTE_BOREK_KEYS):
         return "CATAL BOREK"
     if "EKMEK" in name_up:
         return "EKMEK"
@@ -1060,6 +1252,20 @@ def route_group_for_name(name_up: str) -> Optional[str]:
     return None
 
 
+# Substrings the donuk main pass dispatches on (special text cells and the TATLI/BOREK matrix).
+_MAIN_PASS_KEYWORDS = (
+    "EKLER", "ROKOKO", "MEYVELI", "KUNEFE", "ICIN", "KOLI", "TRILECE", "EKSI MAYALI",
+    "TOST", "KASAR", "KEPEK", "KARISIK", "EKMEK", "BEYAZ", "ESMER", "KIYMA", "BORE",
+    "SADE BASK", "MATCHA", "YABAN MERSINLI", "PATATES", "CATAL", "ISPANAK", "SU",
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def main_pass_tags(name_up: str) -> frozenset:
+    """Keywords from _MAIN_PASS_KEYWORDS contained in a normalized CSV name."""
+    return frozenset(k for k in _MAIN_PASS_KEYWORDS if k in name_up)
+
+
 def match_block_entry(name_up: str, blocks: list, desired_group: Optional[str] = None) -> Optional[Tuple[dict, int, int]]:
     # Try to find best (block, product_row, variant_col)
     best = None
@@ -1073,7 +1279,7 @@ def match_block_entry(name_up: str, blocks: list, desired_group: Optional[str] =
             if not v_up:
                 continue
             # tokenized variant matching: any word length>=3 in csv name
-            tokens = [t for t in re.split(r"\s+", v_up) if len(t) >= 3]
+            tokens = [t for t in _RE_WS.split(v_up) if len(t) >= 3]
             if any(t in name_up for t in tokens):
                 # match product row if any
                 candidate_rows = list(b["rows"].items())
@@ -1100,43 +1306,70 @@ def match_block_entry(name_up: str, blocks: list, desired_group: Optional[str] =
 
 
 
-def find_dondurma_rows(ws: openpyxl.worksheet.worksheet.Worksheet) -> Dict[str, Optional[int]]:
+# Row-label needles for find_dondurma_rows, in precedence order
+_DONDURMA_ROW_KEYS = (
+    ("SUTLU", ("SUTLU",)),
+    ("KAKAOLU", ("KAKAOLU",)),
+    ("ANTEP", ("ANTEP", "FISTIK")),
+    ("KROKAN", ("KROKAN",)),
+    ("KARADUT", ("KARADUT",)),
+    ("LIMON", ("LIMON",)),
+    ("DAMLA", ("DAMLA", "SAKIZ")),
+    ("CILEK", ("CILEK",)),
+    ("LIGHT", ("LIGHT",)),
+    ("BLUE", ("BLUE", "SKY")),
+    ("CARK", ("CARK", "CARKIFELEK")),
+    ("DOSIDO", ("DOSIDO", "DOSİDO")),
+)
+
+
+def column_labels(ws: openpyxl.worksheet.worksheet.Worksheet, col: int = 1) -> list:
+    """(row, normalized text) for every non-empty cell of one column, in row order.
+
+    Lets several row lookups on the same column share a single sheet sweep.
+    """
+    block = sheet_values(ws, 1, ws.max_row, col, col)
+    return [(r, normalize_text(v)) for r, (v,) in enumerate(block, start=1) if v]
+
+
+def find_dondurma_rows(ws: openpyxl.worksheet.worksheet.Worksheet, labels: Optional[list] = None) -> Dict[str, Optional[int]]:
     targets = {"SUTLU": None, "KAKAOLU": None, "ANTEP": None, "KROKAN": None, "KARADUT": None,
                "LIMON": None, "DAMLA": None, "CILEK": None, "LIGHT": None, "BLUE": None,
                "CARK": None, "DOSIDO": None}
-    for r in range(1, ws.max_row + 1):
-        v = ws.cell(row=r, column=1).value
-        if not v:
-            continue
-        up = normalize_text(v)
-        if "SUTLU" in up and targets["SUTLU"] is None:
-            targets["SUTLU"] = r
-        elif "KAKAOLU" in up and targets["KAKAOLU"] is None:
-            targets["KAKAOLU"] = r
-        elif ("ANTEP" in up or "FISTIK" in up) and targets["ANTEP"] is None:
-            targets["ANTEP"] = r
-        elif "KROKAN" in up and targets["KROKAN"] is None:
-            targets["KROKAN"] = r
-        elif "KARADUT" in up and targets["KARADUT"] is None:
-            targets["KARADUT"] = r
-        elif "LIMON" in up and targets["LIMON"] is None:
-            targets["LIMON"] = r
-        elif ("DAMLA" in up or "SAKIZ" in up) and targets["DAMLA"] is None:
-            targets["DAMLA"] = r
-        elif "CILEK" in up and targets["CILEK"] is None:
-            targets["CILEK"] = r
-        elif ("LIGHT" in up) and targets["LIGHT"] is None:
-            targets["LIGHT"] = r
-        elif ("BLUE" in up or "SKY" in up) and targets["BLUE"] is None:
-            targets["BLUE"] = r
-        elif ("CARK" in up or "CARKIFELEK" in up) and targets["CARK"] is None:
-            targets["CARK"] = r
-        elif ("DOSIDO" in up or "DOSİDO" in up) and targets["DOSIDO"] is None:
-            targets["DOSIDO"] = r
+    remaining = len(targets)
+    if labels is None:
+        # lazy sweep so the early exit below also saves the sheet read
+        col_a = ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=1, values_only=True)
+        labels = ((r, normalize_text(v)) for r, (v,) in enumerate(col_a, start=1) if v)
+    for r, up in labels:
+        # First still-unassigned flavor whose needles hit wins (same as the old elif chain)
+        for key, needles in _DONDURMA_ROW_KEYS:
+            if targets[key] is None and any(n in up for n in needles):
+                targets[key] = r
+                remaining -= 1
+                break
+        if remaining == 0:
+            break
     return targets
 
 
+_FLAVOR_TESTS = (
+    ("SUTLU", ("SUTLU",)),
+    ("KAKAOLU", ("KAKAOLU",)),
+    ("ANTEP", ("ANTEP", "FISTIK")),
+    ("KROKAN", ("KROKAN",)),
+    ("KARADUT", ("KARADUT",)),
+    ("LIMON", ("LIMON",)),
+    ("DAMLA", ("DAMLA", "SAKIZ")),
+    ("CILEK", ("CILEK",)),
+    ("CARK", ("CARK", "CARKIFELEK")),
+    ("DOSIDO", ("DOSIDO", "DOSİDO")),
+)
+
+
+@functools.lru_cache(maxsize=4096)
 def flavor_key_from_name(name_up: str) -> str:
+    # Classified once per distinct CSV name; the main pass asks again for every repeated row
     # Precedence matters: BLUE SKY overrides SADE; SADE maps to SUTLU (plain) unless LIGHT explicitly present
     if ("BLUE" in name_up or "SKY" in name_up):
         return "BLUE"
@@ -1144,19 +1377,7 @@ def flavor_key_from_name(name_up: str) -> str:
         return "LIGHT"
     if "SADE" in name_up:
         return "SUTLU"
-    tests = [
-        ("SUTLU", ["SUTLU"]),
-        ("KAKAOLU", ["KAKAOLU"]),
-        ("ANTEP", ["ANTEP", "FISTIK"]),
-        ("KROKAN", ["KROKAN"]),
-        ("KARADUT", ["KARADUT"]),
-        ("LIMON", ["LIMON"]),
-        ("DAMLA", ["DAMLA", "SAKIZ"]),
-        ("CILEK", ["CILEK"]),
-        ("CARK", ["CARK", "CARKIFELEK"]),
-        ("DOSIDO", ["DOSIDO", "DOSİDO"]),
-    ]
-    for key, needles in tests:
+    for key, needles in _FLAVOR_TESTS:
         if any(n in name_up for n in needles):
             return key
     return ""
@@ -1213,7 +1434,7 @@ def match_donuk_product(name_up: str, donuk_map: Dict[str, Tuple[int, int, str]]
     Returns:
         Tuple of (matched_key, score) if match found, None otherwise
     """
-    clean_up = re.sub(r"[\(\{\}\)]", "", name_up).strip()
+    clean_up = _RE_BRACKET_CHARS.sub("", name_up).strip()
 
     # Apply special name mapping first
     mapped_name = map_special_csv_names(clean_up, debug=debug)
@@ -1226,7 +1447,7 @@ def match_donuk_product(name_up: str, donuk_map: Dict[str, Tuple[int, int, str]]
 
     # 1) Try exact match first (after special mapping)
     for excel_key in donuk_map.keys():
-        excel_clean = re.sub(r"[\(\{\}\)]", "", excel_key).strip()
+        excel_clean = _RE_BRACKET_CHARS.sub("", excel_key).strip()
         
         # Exact matches for all products
         if mapped_name == excel_clean:
@@ -1265,7 +1486,7 @@ def match_donuk_product(name_up: str, donuk_map: Dict[str, Tuple[int, int, str]]
     best_score = 0
     
     for excel_key, (row, col, label) in donuk_map.items():
-        excel_clean = re.sub(r"[\(\{\}\)]", "", excel_key).strip()
+        excel_clean = _RE_BRACKET_CHARS.sub("", excel_key).strip()
 
         # Skip fuzzy matching for MANTI and BAKLAVA variants - only exact match allowed
         if "MANTI" in mapped_name or "MANTI" in excel_clean:
@@ -1294,17 +1515,35 @@ def match_donuk_product(name_up: str, donuk_map: Dict[str, Tuple[int, int, str]]
                 print(f"  => NO MATCH found at all")
         return None
 
+
+# Matrix clear: bare numeric text ("12", "1,5") and text carrying an appended qty/unit
+_NUMERIC_TEXT_CHARS = "0123456789,."
+_RE_MATRIX_QTY_TEXT = re.compile(r"\d+\s*(?:SPT\.|KL\.|TEPSI|TEPSİ)", re.IGNORECASE)
+
+
 def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", sheet_name: Optional[str] = None, debug: bool = False, force_donuk: Optional[Iterable[str]] = None):
-    df = read_csv(csv_path)
-    stok_col = find_col(df, ["STOK KODU", "STOKKODU", "KOD"])
-    miktar_col = find_col(df, ["MIKTAR", "MİKTAR", "ADET"])
-    grup_col = find_col(df, ["GRUP", "KATEGORI", "KATEGORI ADI"])
+    # Only the stock/qty/group/unit columns are used below; skip parsing the rest
+    df = read_csv(csv_path, usecols=order_columns)
+    col_index = build_col_index(df)
+    stok_col = find_col(col_index, STOK_COL_CANDIDATES)
+    miktar_col = find_col(col_index, MIKTAR_COL_CANDIDATES)
+    grup_col = find_col(col_index, GRUP_COL_CANDIDATES)
     if not stok_col or not miktar_col:
         raise ValueError("CSV'de 'Stok Kodu' veya 'Miktar' sütunu bulunamadı.")
+    # Normalize product and group names once for every pass below
+    df["_up"] = normalize_series(df[stok_col])
+    df["_grp_up"] = normalize_series(df[grup_col]) if grup_col else ""
+    # Bracket-free name used as the product key by the donuk/makaron passes
+    df["_clean"] = df["_up"].str.replace(_RE_BRACKET_CHARS, "", regex=True).str.strip()
+    # Plain dict rows: avoids building a Series per row in each pass below
+    records = df.to_dict("records")
+    # Parse every quantity once; None marks a value the passes below skip or count as 0
+    for rec in records:
+        rec["_qty"] = parse_qty(rec[miktar_col])
 
     # Build set of actual CSV product names (normalized) for validation
     csv_product_names = set()
-    for _, row in df.iterrows():
+    for row in records:
         try:
             stok_raw = str(row[stok_col]).strip() if stok_col in df.columns else ''
             if '{' in stok_raw:
@@ -1332,26 +1571,26 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
     if debug:
         print(f"[DEBUG] CSV Branch (after mapping) - Primary: '{branch_primary}' (raw: '{branch_primary_raw}'), Fallback: '{branch_fallback}' (raw: '{branch_fallback_raw}')")
 
-    # Prepare force-donuk set (normalized) for trial runs
-    force_set = set()
-    if force_donuk:
-        for item in force_donuk:
-            if item:
-                force_set.add(normalize_text(item))
+    # Prepare force-donuk set (normalized) for trial runs; built once, so a one-shot iterable works too
+    force_set = {normalize_text(item) for item in (force_donuk or ()) if item}
     forced_hits = []  # collect entries that were forced to donuk handling for reporting
 
+    # Full (editable) load on purpose: merged ranges drive the cell lookups and the
+    # template is saved back in place, so read_only/write_only modes do not apply
     if os.path.exists(output_path):
         wb = load_workbook(output_path)
     else:
         wb = Workbook()
 
-    # Prepare force-donuk set (normalized) for trial runs
-    force_set = set()
-    if force_donuk:
-        for item in force_donuk:
-            if item:
-                force_set.add(normalize_text(item))
-    forced_hits = []  # collect entries that were forced to donuk handling for reporting
+    # Branch spans per (sheet, branch): the selected sheet is searched again in the
+    # all-sheets pass and branch_guess repeats one of the names, so each scan runs once
+    branch_span_cache: Dict[Tuple[str, str], Optional[Tuple[int, int, int]]] = {}
+
+    def branch_span(w, name: str) -> Optional[Tuple[int, int, int]]:
+        key = (w.title, name)
+        if key not in branch_span_cache:
+            branch_span_cache[key] = find_branch_span(w, name)
+        return branch_span_cache[key]
 
     # Select target worksheet with priority logic:
     # 1. If user specified a day/sheet (sheet_name):
@@ -1368,7 +1607,7 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
             selected_sheet = wb[sheet_name]
             # PRIORITY 1: Check if branch exists in selected sheet
             if branch_primary:
-                sp = find_branch_span(selected_sheet, branch_primary)
+                sp = branch_span(selected_sheet, branch_primary)
                 if sp:
                     ws = selected_sheet
                     span = sp
@@ -1377,7 +1616,7 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
                         print(f"[DEBUG] Found PRIMARY branch '{branch_primary}' in selected sheet '{sheet_name}'")
             
             if ws is None and branch_fallback:
-                sp = find_branch_span(selected_sheet, branch_fallback)
+                sp = branch_span(selected_sheet, branch_fallback)
                 if sp:
                     ws = selected_sheet
                     span = sp
@@ -1402,7 +1641,7 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
         # Try primary branch first (inner part from parens)
         if branch_primary:
             for w in sheets_to_search:
-                sp = find_branch_span(w, branch_primary)
+                sp = branch_span(w, branch_primary)
                 if sp:
                     ws = w
                     span = sp
@@ -1414,7 +1653,7 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
         # If primary failed, try fallback (outer part from parens)
         if ws is None and branch_fallback:
             for w in sheets_to_search:
-                sp = find_branch_span(w, branch_fallback)
+                sp = branch_span(w, branch_fallback)
                 if sp:
                     ws = w
                     span = sp
@@ -1429,14 +1668,15 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
     
     # Get span if not already found
     if span is None and branch_guess:
-        span = find_branch_span(ws, branch_guess)
+        span = branch_span(ws, branch_guess)
     if span:
         min_c, max_c, branch_row = span
         
         # Find next branch column to avoid crossing boundaries
         next_branch_col = None
-        for c in range(max_c + 1, min(ws.max_column + 1, max_c + 15)):
-            val = ws.cell(row=branch_row, column=c).value
+        ws_max_col = ws.max_column
+        right_of_span = sheet_values(ws, branch_row, branch_row, max_c + 1, min(ws_max_col, max_c + 14))
+        for c, val in enumerate(right_of_span[0] if right_of_span else (), start=max_c + 1):
             if val and str(val).strip():
                 # Check if it's a branch name (not a date/time header)
                 if not any(x in str(val).upper() for x in ["TARIH", "SIPARIS", "TESLIM"]):
@@ -1449,7 +1689,7 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
             max_c = min(max_c + 4, next_branch_col - 1)
         else:
             # Last branch - allow moderate expansion (max 8 cols)
-            max_c = min(max_c + 8, min_c + 12, ws.max_column)
+            max_c = min(max_c + 8, min_c + 12, ws_max_col)
         
         if debug:
             print(f"[DEBUG] Expanded max_c to {max_c} (next_branch_col: {next_branch_col})")
@@ -1469,10 +1709,11 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
 
     # Determine pasta columns relative to the branch span (user provided mapping):
     # Mono: branch_col + 1, Küçük: branch_col + 2, Büyük: branch_col + 3
+    ws_max_col = ws.max_column
     pasta_cols = {
-        "MONO": (min_c + 1) if (min_c + 1) <= ws.max_column else None,
-        "KUCUK": (min_c + 2) if (min_c + 2) <= ws.max_column else None,
-        "BUYUK": (min_c + 3) if (min_c + 3) <= ws.max_column else None,
+        "MONO": (min_c + 1) if (min_c + 1) <= ws_max_col else None,
+        "KUCUK": (min_c + 2) if (min_c + 2) <= ws_max_col else None,
+        "BUYUK": (min_c + 3) if (min_c + 3) <= ws_max_col else None,
     }
     if debug:
         print(f"[DEBUG] Pasta columns assigned from branch span: {pasta_cols} (min_c={min_c})")
@@ -1532,15 +1773,27 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
     except NameError:
         processed_products = set()
 
+    # String cells of the branch span (rows 1..max_row, min_c..max_c) in row-major order,
+    # read once and shared by the text lookups below. Reset to None after writes that
+    # may change text cells so the next lookup reads the sheet again.
+    span_text_cells = None  # [row, col, text, normalized] for non-empty string cells
+
+    def branch_span_text_cells() -> list:
+        nonlocal span_text_cells
+        if span_text_cells is None:
+            span_text_cells = []
+            c_lo = max(1, min_c)
+            block = sheet_values(ws, 1, ws.max_row, c_lo, min(ws.max_column, max_c))
+            for r_, row_vals in enumerate(block, start=1):
+                for c_, val_ in enumerate(row_vals, start=c_lo):
+                    if val_ and isinstance(val_, str):
+                        span_text_cells.append([r_, c_, val_, normalize_text(val_)])
+        return span_text_cells
+
     # Simple pass: iterate CSV and handle rows matching any special token
-    for idx, row in df.iterrows():
-        try:
-            name_raw = str(row[stok_col])
-            qty_raw = row[miktar_col]
-        except Exception:
-            continue
-        up = normalize_text(name_raw)
-        clean_up = re.sub(r"[\(\{\}\)]", "", up).strip()
+    for row in records:
+        name_raw = str(row[stok_col])
+        clean_up = row["_clean"]
 
         # skip already-processed (from earlier runs)
         if clean_up in processed_products:
@@ -1571,9 +1824,8 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
             continue
 
         # parse qty
-        try:
-            qty = float(str(qty_raw).replace(",", "."))
-        except Exception:
+        qty = row["_qty"]
+        if qty is None:
             if debug:
                 print(f"[DEBUG] SIMPLE PASS: could not parse qty for '{name_raw}'")
             continue
@@ -1594,17 +1846,10 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
         if not target:
             found = None
             try:
-                for rr in range(1, ws.max_row + 1):
-                    for cc in range(max(1, min_c), min(ws.max_column, max_c) + 1):
-                        val = ws.cell(row=rr, column=cc).value
-                        if not val or not isinstance(val, str):
-                            continue
-                        upv = normalize_text(val)
-                        # Use exact match for critical products to avoid confusion
-                        if matched_token == upv:
-                            found = (rr, cc, val)
-                            break
-                    if found:
+                for rr, cc, val, upv in branch_span_text_cells():
+                    # Use exact match for critical products to avoid confusion
+                    if matched_token == upv:
+                        found = (rr, cc, val)
                         break
             except Exception:
                 found = None
@@ -1668,10 +1913,11 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
                 unit_text = "SPT."
             new_text = append_text_with_space(orig_text, f"{fmt_qty} {unit_text}")
             try:
+                span_text_cells = None
                 safe_write(ws, row_idx, col_idx, new_text)
                 processed_products.add(clean_up)
-                simple_pass_hits.append({"csv": name_raw, "matched": orig_text, "row": row_idx, "col": col_idx, "qty": qty, "excel_name": map_special_csv_names(clean_up)})
                 if debug:
+                    simple_pass_hits.append({"csv": name_raw, "matched": orig_text, "row": row_idx, "col": col_idx, "qty": qty, "excel_name": map_special_csv_names(clean_up)})
                     print(f"[DEBUG] SIMPLE PASS WRITE r={row_idx} c={col_idx} val='{new_text}' for CSV='{name_raw}' -> EXCEL='{map_special_csv_names(clean_up)}' qty={qty}")
             except Exception as e:
                 if debug:
@@ -1684,17 +1930,17 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
     # --- end simple pass --------------------------------------------------------
 
     # Ensure aggregator exists
-    aggreg: Dict[Tuple[int, int], float] = {}
+    aggreg: DefaultDict[Tuple[int, int], float] = defaultdict(float)
     matched = 0
 
     # Dictionary to collect DONUK product quantities
-    donuk_aggreg: Dict[str, float] = {}
+    donuk_aggreg: DefaultDict[str, float] = defaultdict(float)
     # NOTE: DO NOT reset processed_products here! It was populated in simple pass above
     # and must be preserved to avoid re-processing the same items
     # processed_products = set()  # REMOVED - keeps simple pass products marked as processed
     
     # Separate dictionary for MAKARON quantities (keep makaron logic independent from DONUK)
-    makaron_aggreg: Dict[str, float] = {}
+    makaron_aggreg: DefaultDict[str, float] = defaultdict(float)
 
     # Helper: check whether a CSV product name has any reasonable match in the
     # Excel-side maps (donuk_map or makaron_map). If a product is classified as
@@ -1708,7 +1954,7 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
         for k in donuk_map.keys():
             if not k:
                 continue
-            k_clean = re.sub(r"[\(\{\}\)]", "", k).strip()
+            k_clean = _RE_BRACKET_CHARS.sub("", k).strip()
             if k_clean == name_up or name_up in k_clean or k_clean in name_up:
                 return True
             k_words = set(w for w in k_clean.split() if len(w) > 2)
@@ -1729,19 +1975,14 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
         # This allows specific-group products to be accepted if they appear
         # elsewhere in the template (pasta rows, matrix blocks, etc.).
         try:
-            for rr in range(1, ws.max_row + 1):
-                for cc in range(max(1, min_c), min(ws.max_column, max_c) + 1):
-                    val = ws.cell(row=rr, column=cc).value
-                    if not val or not isinstance(val, str):
-                        continue
-                    upv = normalize_text(val)
-                    if not upv:
-                        continue
-                    if upv == name_up or name_up in upv or upv in name_up:
-                        return True
-                    upv_words = set(w for w in upv.split() if len(w) > 2)
-                    if name_words & upv_words:
-                        return True
+            for _, _, _, upv in branch_span_text_cells():
+                if not upv:
+                    continue
+                if upv == name_up or name_up in upv or upv in name_up:
+                    return True
+                upv_words = set(w for w in upv.split() if len(w) > 2)
+                if name_words & upv_words:
+                    return True
         except Exception:
             # If anything goes wrong scanning the sheet, fall back to False
             pass
@@ -1750,17 +1991,16 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
 
     # Aggregate DONUK entries from CSV
     if donuk_map:
-        for _, r in df.iterrows():
-            try:
-                name_raw = str(r[stok_col])
-                group_val = normalize_text(str(r.get(grup_col, ""))) if grup_col else ""
-                miktar_val = float(str(r[miktar_col]).replace(",", "."))
-            except Exception:
+        for r in records:
+            name_raw = str(r[stok_col])
+            group_val = r["_grp_up"]
+            miktar_val = r["_qty"]
+            if miktar_val is None:
                 continue
 
             # Normalize name
-            up = normalize_text(name_raw)
-            clean_up = re.sub(r"[\(\{\}\)]", "", up).strip()
+            up = r["_up"]
+            clean_up = r["_clean"]
 
             # If this product matches any forced token, treat as DONUK candidate
             forced_flag = False
@@ -1770,14 +2010,15 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
                         forced_flag = True
                         break
 
-            # Apply special mappings with debug info
-            mapped_name = map_special_csv_names(clean_up, debug=debug)
-            if mapped_name != clean_up and debug:
-                print(f"\n[SPECIAL PRODUCT FOUND] Processing:")
-                print(f"Original CSV name: {name_raw}")
-                print(f"Normalized: {clean_up}")
-                print(f"Mapped to: {mapped_name}")
-                print(f"Quantity: {miktar_val}\n")
+            # Apply special mappings with debug info (the mapped name is only reported)
+            if debug:
+                mapped_name = map_special_csv_names(clean_up, debug=debug)
+                if mapped_name != clean_up:
+                    print(f"\n[SPECIAL PRODUCT FOUND] Processing:")
+                    print(f"Original CSV name: {name_raw}")
+                    print(f"Normalized: {clean_up}")
+                    print(f"Mapped to: {mapped_name}")
+                    print(f"Quantity: {miktar_val}\n")
 
             # Skip if already processed
             if clean_up in processed_products:
@@ -1816,7 +2057,7 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
             
             for excel_key in donuk_map.keys():
                 # Compare names after removing special characters
-                excel_clean = re.sub(r"[\(\{\}\)]", "", excel_key).strip()
+                excel_clean = _RE_BRACKET_CHARS.sub("", excel_key).strip()
                 
                 # Exact match first
                 if up == excel_clean:
@@ -1902,16 +2143,15 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
                         print(f"[DEBUG] SKIPPING '{name_raw}' - not found in CSV product list (Excel match: '{best_match}')")
                     continue
                 
-                try:
-                    qty = float(str(r[miktar_col]).replace(",", "."))
-                except Exception:
+                qty = r["_qty"]
+                if qty is None:
                     if debug:
                         print(f"[DEBUG] DONUK WARNING: could not parse qty for '{name_raw}'")
                     continue
 
                 if "MAKARON" in up:
                     # Extract variant from parentheses or main text
-                    m = re.search(r"\(([^)]+)\)", name_raw)
+                    m = _RE_PAREN_INNER.search(name_raw)
                     variant = normalize_text(m.group(1) if m else name_raw)
                     # Normalize variant names
                     variant_map = {
@@ -1931,7 +2171,7 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
                         # Only aggregate macaron quantities into the dedicated makaron_aggreg
                         # and only if the Excel template actually contains that variant.
                         if best_variant in makaron_map:
-                            makaron_aggreg[best_variant] = makaron_aggreg.get(best_variant, 0.0) + qty
+                            makaron_aggreg[best_variant] += qty
                         else:
                             if debug:
                                 print(f"[DEBUG] MAKARON WARNING: Excel has no cell for variant '{best_variant}' (source='{name_raw}')")
@@ -1939,12 +2179,12 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
                             continue
                 elif "HAMBURGER" in clean_up and "KOFTE" in clean_up and "MUTFAK" == group_val:
                     donuk_key = "HAMBURGER KÖFTE"
-                    donuk_aggreg[donuk_key] = donuk_aggreg.get(donuk_key, 0.0) + qty
+                    donuk_aggreg[donuk_key] += qty
                 elif "SOSLU" in clean_up and "TAVUK" in clean_up and "MUTFAK" == group_val:
                     donuk_key = "ACI-TATLI SOSLU TAVUK"
-                    donuk_aggreg[donuk_key] = donuk_aggreg.get(donuk_key, 0.0) + qty
+                    donuk_aggreg[donuk_key] += qty
                 elif best_match:
-                    donuk_aggreg[best_match] = donuk_aggreg.get(best_match, 0.0) + qty
+                    donuk_aggreg[best_match] += qty
                 matched += 1
                 if debug:
                     print(f"[DEBUG] DONUK + {name_raw} -> product='{best_match}' qty={qty}")
@@ -2033,15 +2273,15 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
 
     # Aggregate MAKARON entries from CSV: CSV usually has variant in parentheses (Makaron (ÇİKOLATALI))
     if makaron_map:
-        for _, r in df.iterrows():
+        for r in records:
             try:
                 name_raw = str(r[stok_col])
             except Exception:
                 continue
-            up = normalize_text(name_raw)
-            grp_val = normalize_text(str(r.get(grup_col, ""))) if grup_col else ""
+            up = r["_up"]
+            grp_val = r["_grp_up"]
             # skip rows already processed in the donuk pass
-            clean_up = re.sub(r"[\(\{\}\)]", "", up).strip()
+            clean_up = r["_clean"]
             if clean_up in processed_products:
                 continue
             # detect makaron rows: name or group mentions MAKARON
@@ -2051,7 +2291,7 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
             # Prepare candidate key from CSV name/group
             csv_variant = None
             # First try extracting from parentheses
-            m = re.search(r"\(([^)]+)\)", name_raw)
+            m = _RE_PAREN_INNER.search(name_raw)
 
             
             # Normalize FISTIK and YABANMERSINLI spellings in parentheses
@@ -2111,15 +2351,14 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
                     print(f"[DEBUG] MAKARON WARNING: could not determine variant for '{name_raw}'")
                 continue
             
-            try:
-                qty = float(str(r[miktar_col]).replace(",", "."))
-            except Exception:
+            qty = r["_qty"]
+            if qty is None:
                 if debug:
                     print(f"[DEBUG] DONUK WARNING: could not parse qty for '{name_raw}'")
                 continue
             
             # Update macaron aggregation (separate from donuk aggregation)
-            makaron_aggreg[best_match] = makaron_aggreg.get(best_match, 0.0) + qty
+            makaron_aggreg[best_match] += qty
             processed_products.add(clean_up)
             matched += 1
             if debug:
@@ -2174,9 +2413,9 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
                     print(f"[DEBUG] MAKARON WRITE ERROR r={row_idx} c={col_idx} val='{new_text}' error={e}")
 
     # Aggregate pasta entries from CSV into aggreg by mapping pasta type -> pasta_rows and size -> pasta_cols
-    for _, r in df.iterrows():
+    for r in records:
         name = str(r[stok_col])
-        up = normalize_text(name)
+        up = r["_up"]
 
         pasta_key = pasta_key_from_name(up)
         if not pasta_key:
@@ -2189,7 +2428,7 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
 
         # choose column by size tokens in CSV name/unit
         col_idx = None
-        if "MONO" in up or "TEK" in up or re.search(r"\b36\b", up):
+        if "MONO" in up or "TEK" in up or _RE_WORD_36.search(up):
             col_idx = pasta_cols.get("MONO")
             if debug:
                 print(f"[DEBUG] MONO pasta detected, column={col_idx}")
@@ -2210,9 +2449,8 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
                 print(f"[DEBUG] WARNING: No column match for size in: {name}")
             continue
 
-        try:
-            qty = float(str(r[miktar_col]).replace(",", "."))
-        except Exception:
+        qty = r["_qty"]
+        if qty is None:
             continue
 
         row_idx = pasta_rows.get(pasta_key)
@@ -2222,7 +2460,7 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
             continue
 
         key = (row_idx, col_idx)
-        aggreg[key] = aggreg.get(key, 0.0) + qty
+        aggreg[key] += qty
         matched += 1
 
     if debug:
@@ -2230,22 +2468,26 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
         print(f"[DEBUG] DONDURMALAR header at row={header_row}")
         print(f"[DEBUG] Size columns: {size_cols}")
 
-    flavor_rows = find_dondurma_rows(ws)
+    # Column A labels, read once for the flavor rows and the TOST/EKMEK/... row lookups below
+    col_a_labels = column_labels(ws, 1)
+    flavor_rows = find_dondurma_rows(ws, col_a_labels)
     if debug:
         print(f"[DEBUG] Flavor rows: {flavor_rows}")
 
     # 'aggreg' and 'matched' may already be populated by earlier pasta aggregation.
     # Keep block_aggreg and other counters here.
-    block_aggreg: Dict[Tuple[int, int], float] = {}
+    block_aggreg: DefaultDict[Tuple[int, int], float] = defaultdict(float)
     rokoko_total: float = 0.0
 
-    blocks = build_blocks(ws, min_c, max_c)
+    # The TATLI/BOREK rows below are routed by the explicit 4-subcolumn layout; the generic
+    # matrix blocks are only reported, so skip their sheet scan unless debugging
     if debug:
+        blocks = build_blocks(ws, min_c, max_c)
         print(f"[DEBUG] Blocks: {[{'group': b['group'], 'header_row': b['header_row'], 'variants': list(b['variants'].keys())} for b in blocks]}")
 
     # Explicit 4-subcolumn layout under this branch
     # Determine the 4 numeric subcolumns of this branch
-    sub_cols = [min_c + i for i in range(4) if (min_c + i) <= ws.max_column]
+    sub_cols = list(range(min_c, min(min_c + 4, ws.max_column + 1)))
 
     # CRITICAL FIX: Clamp size columns to the branch's 4-column layout to prevent spillover
     # Layout per branch group:
@@ -2263,11 +2505,7 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
         size_cols["150GR"] = sub_cols[3]
     # Helper: find row index by label(s) in column A
     def find_row_by_label(keywords: Iterable[str]) -> Optional[int]:
-        for rr in range(1, ws.max_row + 1):
-            v = ws.cell(row=rr, column=1).value
-            if not v:
-                continue
-            upv = normalize_text(v)
+        for rr, upv in col_a_labels:
             if all(k in upv for k in keywords):
                 return rr
         return None
@@ -2278,60 +2516,52 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
     row_catal = find_row_by_label(["CATAL", "BOREK"]) if sub_cols else None
     
     # Aggregators for explicit layout
-    matrix_aggreg: Dict[Tuple[int, int], float] = {}
+    matrix_aggreg: DefaultDict[Tuple[int, int], float] = defaultdict(float)
     kunefe_total_sum: float = 0.0
     trilece_total_sum: float = 0.0
     trilece_csv_name: str = ""  # Track CSV source name for unit determination
     eksi_mayali_total_sum: float = 0.0
     ekler_total_sum: float = 0.0
-    for _, r in df.iterrows():
-        name = str(r[stok_col])
-        grp = str(r[grup_col]) if grup_col and grup_col in df.columns else ""
-        up = normalize_text(name)
-        g_up = normalize_text(grp)
-        
-
-        if "EKLER" in up:
-            try:
-                qty_r = float(str(r[miktar_col]).replace(",", "."))
-            except Exception:
-                qty_r = 0.0
+    # Column arrays for the main pass: names/groups/units stringified and normalized once.
+    # str() per value (not astype(str), which keeps NaN missing on pandas' string dtype)
+    unit_col = "Birim" if "Birim" in df.columns else ("BIRIM" if "BIRIM" in df.columns else None)
+    col_names = [str(v) for v in df[stok_col].tolist()]
+    col_ups = df["_up"].tolist()
+    col_g_ups = df["_grp_up"].tolist()
+    col_units = [str(v) for v in df[unit_col].tolist()] if unit_col else [""] * len(df)
+    col_qtys = [rec["_qty"] for rec in records]
+    for name, up, g_up, unit_text, qty_val in zip(col_names, col_ups, col_g_ups, col_units, col_qtys):
+        tags = main_pass_tags(up)
+
+        if "EKLER" in tags:
+            qty_r = 0.0 if qty_val is None else qty_val
             ekler_total_sum += qty_r
             matched += 1
             if debug:
                 print(f"[DEBUG] EKLER +{qty_r} now {ekler_total_sum}")
             continue
         # Collect MEYVELI ROKOKO totals for a dedicated text cell update later
-        if ("ROKOKO" in up and "MEYVELI" in up) or ("MEYVELI" in up and "ROKOKO" in up):
-            try:
-                qty_r = float(str(r[miktar_col]).replace(",", "."))
-            except Exception:
-                qty_r = 0.0
+        if "ROKOKO" in tags and "MEYVELI" in tags:
+            qty_r = 0.0 if qty_val is None else qty_val
             rokoko_total += qty_r
             if debug:
                 print(f"[DEBUG] ROKOKO +{qty_r} now {rokoko_total}")
             continue  # ROKOKO is handled as a text cell, not in the DONDURMALAR grid
         # New explicit mapping path for TATLI/BOREK items
-        if "KUNEFE" in up:
+        if "KUNEFE" in tags:
             # Exclude packaging/support lines like "KUNEFE ICIN KAP KOLISI" (group SARF MALZEME or contains ICIN/KOLI)
-            if ("ICIN" in up or "KOLI" in up or g_up == "SARF MALZEME"):
+            if ("ICIN" in tags or "KOLI" in tags or g_up == "SARF MALZEME"):
                 if debug:
                     print(f"[DEBUG] KUNEFE packaging row skipped: up='{up}' grp='{g_up}'")
             else:
-                try:
-                    qty_r = float(str(r[miktar_col]).replace(",", "."))
-                except Exception:
-                    qty_r = 0.0
+                qty_r = 0.0 if qty_val is None else qty_val
                 kunefe_total_sum += qty_r
                 matched += 1
                 if debug:
                     print(f"[DEBUG] KUNEFE +{qty_r} now {kunefe_total_sum}")
             continue
-        if "TRILECE" in up:
-            try:
-                qty_r = float(str(r[miktar_col]).replace(",", "."))
-            except Exception:
-                qty_r = 0.0
+        if "TRILECE" in tags:
+            qty_r = 0.0 if qty_val is None else qty_val
             trilece_total_sum += qty_r
             # Capture CSV name for unit determination (KARAMELLI vs DONUK)
             if not trilece_csv_name:
@@ -2340,11 +2570,8 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
             if debug:
                 print(f"[DEBUG] TRILECE +{qty_r} now {trilece_total_sum} (csv_name={up})")
             continue
-        if "EKSI MAYALI" in up:
-            try:
-                qty_r = float(str(r[miktar_col]).replace(",", "."))
-            except Exception:
-                qty_r = 0.0
+        if "EKSI MAYALI" in tags:
+            qty_r = 0.0 if qty_val is None else qty_val
             eksi_mayali_total_sum += qty_r
             matched += 1
             if debug:
@@ -2352,93 +2579,83 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
             continue
         
         if g_up in ("TATLI", "BOREK") and sub_cols:
-            # parse quantity
-            try:
-                qty = float(str(r[miktar_col]).replace(",", "."))
-            except Exception:
-                qty = None
+            qty = qty_val
             if qty is not None and qty != 0:
-                def add(rr: Optional[int], cols: Iterable[int], val: float):
-                    if not rr:
-                        return
-                    for c_ in cols:
-                        key = (rr, c_)
-                        matrix_aggreg[key] = matrix_aggreg.get(key, 0.0) + val
-                        if debug:
-                            print(f"[DEBUG] MATRIX + r={rr} c={c_} val={val} src='{name}'")
-
                 # Specials (apply before groups)
                 
 
                 # TOST
-                if row_tost and "TOST" in up:
-                    if "KASAR" in up:
-                        add(row_tost, [sub_cols[0]], qty)
+                if row_tost and "TOST" in tags:
+                    if "KASAR" in tags:
+                        matrix_aggreg[(row_tost, sub_cols[0])] += qty
                         matched += 1
                         continue
-                    if "KEPEK" in up and len(sub_cols) >= 2:
-                        add(row_tost, [sub_cols[1]], qty)
+                    if "KEPEK" in tags and len(sub_cols) >= 2:
+                        matrix_aggreg[(row_tost, sub_cols[1])] += qty
                         matched += 1
                         continue
-                    if "KARISIK" in up:
+                    if "KARISIK" in tags:
                         cols = sub_cols[2:4] if len(sub_cols) >= 4 else sub_cols[2:3]
                         if cols:
-                            add(row_tost, cols, qty)
+                            for c_ in cols:
+                                matrix_aggreg[(row_tost, c_)] += qty
                             matched += 1
                             continue
 
                 # EKMEK
                 if row_ekmek:
-                    if ("EKMEK" in up) and ("BEYAZ" in up):
-                        add(row_ekmek, [sub_cols[0]], qty)
+                    if "EKMEK" in tags and "BEYAZ" in tags:
+                        matrix_aggreg[(row_ekmek, sub_cols[0])] += qty
                         matched += 1
                         continue
-                    if ("EKMEK" in up) and ("ESMER" in up) and len(sub_cols) >= 2:
-                        add(row_ekmek, [sub_cols[1]], qty)
+                    if "EKMEK" in tags and "ESMER" in tags and len(sub_cols) >= 2:
+                        matrix_aggreg[(row_ekmek, sub_cols[1])] += qty
                         matched += 1
                         continue
-                    if ("KIYMALI" in up or "KIYMA" in up) and ("BORE" in up):
+                    if "KIYMA" in tags and "BORE" in tags:
                         cols = sub_cols[2:4] if len(sub_cols) >= 4 else sub_cols[2:3]
                         if cols:
-                            add(row_ekmek, cols, qty)
+                            for c_ in cols:
+                                matrix_aggreg[(row_ekmek, c_)] += qty
                             matched += 1
                             continue
 
                 # CHEESECAKE (BASK)
                 if row_cheese:
                     # New Bask Cheesecake Variants
-                    if "SADE BASK" in up:
-                        add(row_cheese, [sub_cols[0]], qty)
+                    if "SADE BASK" in tags:
+                        matrix_aggreg[(row_cheese, sub_cols[0])] += qty
                         matched += 1
                         continue
-                    if "MATCHA" in up:
+                    if "MATCHA" in tags:
                         if len(sub_cols) >= 2:
-                            add(row_cheese, [sub_cols[1]], qty)
+                            matrix_aggreg[(row_cheese, sub_cols[1])] += qty
                             matched += 1
                             continue
-                    if "YABAN MERSINLI" in up:
+                    if "YABAN MERSINLI" in tags:
                         if len(sub_cols) >= 3:
-                            add(row_cheese, [sub_cols[2]], qty)
+                            matrix_aggreg[(row_cheese, sub_cols[2])] += qty
                             matched += 1
                             continue
 
                 # ÇATAL BÖREK - PATATESLİ ÇATAL discontinued, never write to it
                 if row_catal:
                     # Skip Patatesli Çatal (discontinued) - only match if explicitly ÇATAL/BÖREK in name
-                    if "PATATES" in up and ("CATAL" in up or "BOREK" in up or "BORE" in up):
+                    if "PATATES" in tags and ("CATAL" in tags or "BORE" in tags):
                         # Patatesli Çatal discontinued - do NOT write
                         if debug:
                             print(f"[DEBUG] Skipping PATATESLİ ÇATAL (discontinued): '{name}'")
                         matched += 1  # Count as matched to avoid unmatched warnings
                         continue
-                    if "ISPANAK" in up and len(sub_cols) >= 2:
-                        add(row_catal, [sub_cols[1]], qty)
+                    if "ISPANAK" in tags and len(sub_cols) >= 2:
+                        matrix_aggreg[(row_catal, sub_cols[1])] += qty
                         matched += 1
                         continue
-                    if ("SU" in up) and ("BORE" in up):
+                    if "SU" in tags and "BORE" in tags:
                         cols = sub_cols[2:4] if len(sub_cols) >= 3 else []
                         if cols:
-                            add(row_catal, cols, qty)
+                            for c_ in cols:
+                                matrix_aggreg[(row_catal, c_)] += qty
                             matched += 1
                             continue
         # Else try DONDURMALAR grid
@@ -2448,7 +2665,6 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
         row_idx = flavor_rows.get(fkey)
         if not row_idx:
             continue
-        unit_text = str(r.get("Birim", r.get("BIRIM", "")))
         sz = size_from_stock_or_unit(name, unit_text)
         if not sz:
             # Special-case DOSIDO: no explicit size, write into 3,5 KG by convention
@@ -2460,16 +2676,18 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
         # If size columns couldn't be detected for this branch, skip to avoid writing into wrong areas
         if not col_idx:
             continue
-        try:
-            qty = float(str(r[miktar_col]).replace(",", "."))
-        except Exception:
+        if qty_val is None:
             continue
+        qty = qty_val
         key = (row_idx, col_idx)
-        aggreg[key] = aggreg.get(key, 0.0) + qty
+        aggreg[key] += qty
         matched += 1
         if debug:
             print(f"[DEBUG] + {name} -> fkey={fkey} size={sz} row={row_idx} col={col_idx} qty={qty}")
 
+    if debug and matrix_aggreg:
+        print(f"[DEBUG] MATRIX totals: {dict(matrix_aggreg)}")
+
     # CRITICAL: Clear ONLY cells within THIS branch's column span (min_c to max_c)
     # This prevents clearing other branches' data on the same sheet
     # Example: GÜZELBAHÇE (cols 6-14) should NOT clear URLA (cols 10-18) data
@@ -2481,10 +2699,24 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
     
     if debug:
         print(f"[DEBUG] Clearing cells: rows={rows_to_clear}, cols={cols_in_branch_span} (branch span: {min_c}-{max_c})")
-    
+
+    # Merges are not changed in this flow, so a resolved column stays valid for the
+    # clear pass and the write pass below
+    @functools.lru_cache(maxsize=None)
+    def resolve_col(r: int, c: int) -> int:
+        return resolve_numeric_col(ws, r, c, min_c, max_c)
+
+    # Plain (unmerged) cells that the aggreg write pass below overwrites anyway need no clearing
+    merged_at = merge_index(ws)
+    overwritten = set()
+    for (r_, c_) in aggreg:
+        target = (r_, resolve_col(r_, c_))
+        if target not in merged_at:
+            overwritten.add(target)
+
     for rr in rows_to_clear:
         for cc_raw in cols_in_branch_span:
-            cc = resolve_numeric_col(ws, rr, cc_raw, min_c, max_c)
+            cc = resolve_col(rr, cc_raw)
             
             if debug:
                 print(f"[DEBUG] Clear loop: rr={rr} cc_raw={cc_raw} -> resolved cc={cc} (span: {min_c}-{max_c})")
@@ -2494,13 +2726,15 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
                 if debug:
                     print(f"[DEBUG] Skipping clear at r={rr} c={cc} (outside branch span {min_c}-{max_c})")
                 continue
+            if (rr, cc) in overwritten:
+                continue
             
             cell = ws.cell(row=rr, column=cc)
             val = cell.value
             if isinstance(val, (int, float)):
                 cell.value = None
             # Clean text values that contain qty/unit patterns (including KOLI for DOSIDO)
-            elif isinstance(val, str) and re.search(r"\d+\s*(?:SPT\.|KL\.|TEPSI|TEPSİ|KOLİ|KOLI)", val, re.IGNORECASE):
+            elif isinstance(val, str) and _RE_QTY_UNIT_ANY.search(val):
                 cleaned = clean_text_from_quantities(val)
                 if cleaned:
                     cell.value = cleaned
@@ -2515,15 +2749,11 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
                     pass
 
     # Clear numeric cells in Dondurmalar block
+    pasta_row_set = {rv for rv in pasta_rows.values() if rv}
+    pasta_col_set = {cv for cv in pasta_cols.values() if cv}
     for (r_, c_), v in aggreg.items():
-        cc = resolve_numeric_col(ws, r_, c_, min_c, max_c)
+        cc = resolve_col(r_, c_)
         # If this cell belongs to PASTA area, write as text with unit instead of numeric
-        try:
-            pasta_row_set = set([rv for rv in (pasta_rows.values() if 'pasta_rows' in locals() else []) if rv])
-            pasta_col_set = set([cv for cv in ((pasta_cols.values() if 'pasta_cols' in locals() else [])) if cv])
-        except Exception:
-            pasta_row_set, pasta_col_set = set(), set()
-
         is_pasta_cell = (r_ in pasta_row_set) and (cc in pasta_col_set)
 
         try:
@@ -2600,11 +2830,11 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
                 try:
                     cell = ws.cell(row=rr, column=cc)
                     val = cell.value
-                    # Clear numeric values
-                    if isinstance(val, (int, float)) or (isinstance(val, str) and val.strip() and re.match(r"^[0-9,\.]+$", val.strip())):
+                    # Clear numeric values (text made only of digits, commas and dots counts as numeric)
+                    if isinstance(val, (int, float)) or (isinstance(val, str) and val.strip() and not val.strip().strip(_NUMERIC_TEXT_CHARS)):
                         cell.value = None
                     # Clean text values that contain qty/unit patterns (e.g., "2 KL.", "4 SPT.")
-                    elif isinstance(val, str) and re.search(r"\d+\s*(?:SPT\.|KL\.|TEPSI|TEPSİ)", val, re.IGNORECASE):
+                    elif isinstance(val, str) and _RE_MATRIX_QTY_TEXT.search(val):
                         # Clean the text but keep the product name part
                         cleaned = clean_text_from_quantities(val)
                         if cleaned:
@@ -2636,40 +2866,49 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
         # no direct numeric mirroring for ŞERBET; text update below
 
     # Update KÜNEFE/ŞERBET/DONUK KAR. TRİLEÇE using MEYVELI ROKOKO text update logic
-    # These should update the text in the cell, not write to separate numeric cells
-
-    if kunefe_total_sum and ws is not None and min_c and max_c:
-        fmt_qty = int(kunefe_total_sum) if float(kunefe_total_sum).is_integer() else kunefe_total_sum
-        
-        # Search for KÜNEFE only in branch span columns (min_c to max_c)
-        for r in range(1, ws.max_row + 1):
-            for c in range(min_c, max_c + 1):
-                val = ws.cell(row=r, column=c).value
-                if not isinstance(val, str):
-                    continue
-                upv = normalize_text(val)
-                if "KUNEFE" in upv or "KÜNEFE" in upv:
-                    # CRITICAL: Clean existing cell value to remove old qty/unit before appending new value
-                    text_clean = clean_text_from_quantities(val)
-                    unit_text = "KL." if force_koli_all else "KL."
-                    new_text = append_text_with_space(text_clean, f"{fmt_qty} {unit_text}")
-                    try:
-                        safe_write(ws, r, c, new_text)
-                    except Exception:
-                        try:
-                            ws.cell(row=r, column=c).value = new_text
-                        except Exception:
-                            pass
-                    if debug:
-                        print(f"[DEBUG] KUNEFE TEXT WRITE r={r} c={c} val='{new_text}' (branch column)")
-                    # Update only the first match
-                    break
-            else:
+    # These should update the text in the cell, not write to separate numeric cells.
+    # Each update rewrites the FIRST matching text cell (row-major) in the branch span
+    # (min_c to max_c). Cells were rewritten above, so start from a fresh read and keep
+    # it in sync with the writes here.
+    span_text_cells = None
+
+    def update_first_text_cell(matches, make_text, label: str) -> None:
+        for entry in branch_span_text_cells():
+            r_, c_, val_, upv = entry
+            if upv is None or not matches(upv):
                 continue
-            break
+            # CRITICAL: Clean existing cell value to remove old qty/unit before appending new value
+            text_clean = clean_text_from_quantities(val_)
+            new_text = make_text(text_clean)
+            try:
+                safe_write(ws, r_, c_, new_text)
+            except Exception:
+                try:
+                    ws.cell(row=r_, column=c_).value = new_text
+                except Exception:
+                    pass
+            if debug:
+                print(f"[DEBUG] {label} TEXT WRITE r={r_} c={c_} val='{new_text}' (branch column)")
+            cur = ws.cell(row=r_, column=c_).value
+            entry[2], entry[3] = (cur, normalize_text(cur)) if isinstance(cur, str) else (None, None)
+            # Update only the first match
+            return
+
+    def qty_text(total: float) -> str:
+        return int(total) if float(total).is_integer() else total
+
+    text_updates_enabled = ws is not None and min_c and max_c
+
+    if kunefe_total_sum and text_updates_enabled:
+        fmt_qty = qty_text(kunefe_total_sum)
+        update_first_text_cell(
+            lambda upv: "KUNEFE" in upv or "KÜNEFE" in upv,
+            lambda text: append_text_with_space(text, f"{fmt_qty} KL."),
+            "KUNEFE",
+        )
 
-    if trilece_total_sum and ws is not None and min_c and max_c:
-        fmt_qty = int(trilece_total_sum) if float(trilece_total_sum).is_integer() else trilece_total_sum
+    if trilece_total_sum and text_updates_enabled:
+        fmt_qty = qty_text(trilece_total_sum)
         
         # Determine unit based on CSV source name: KARAMELLI→Tepsi, DONUK→SPT
         if "KARAMELLI" in trilece_csv_name or "KARAMEL" in trilece_csv_name:
@@ -2680,154 +2919,51 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
             # Default to SPT if unclear
             trilece_unit = "KL." if force_koli_all else "SPT."
         
-        # Search for DONUK KAR. TRİLEÇE only in branch span columns (min_c to max_c)
-        for r in range(1, ws.max_row + 1):
-            for c in range(min_c, max_c + 1):
-                    val = ws.cell(row=r, column=c).value
-                    if not isinstance(val, str):
-                        continue
-                    upv = normalize_text(val)
-                    if "DONUK" in upv and ("TRILECE" in upv or "TRİLEÇE" in upv):
-                        # CRITICAL: Clean existing cell value to remove old qty/unit before appending new value
-                        text_clean = clean_text_from_quantities(val)
-                        new_text = append_text_with_space(text_clean, f"{fmt_qty} {trilece_unit}")
-                        try:
-                            safe_write(ws, r, c, new_text)
-                        except Exception:
-                            try:
-                                ws.cell(row=r, column=c).value = new_text
-                            except Exception:
-                                pass
-                        if debug:
-                            print(f"[DEBUG] TRİLEÇE TEXT WRITE r={r} c={c} val='{new_text}' unit={trilece_unit} (csv={trilece_csv_name})")
-                        # Update only the first match
-                        break
-            else:
-                continue
-            break
+        # DONUK KAR. TRİLEÇE
+        update_first_text_cell(
+            lambda upv: "DONUK" in upv and ("TRILECE" in upv or "TRİLEÇE" in upv),
+            lambda text: append_text_with_space(text, f"{fmt_qty} {trilece_unit}"),
+            "TRİLEÇE",
+        )
 
     # ŞERBET should mirror KÜNEFE quantity using text update logic
-    if kunefe_total_sum and ws is not None and min_c and max_c:
-        fmt_qty = int(kunefe_total_sum) if float(kunefe_total_sum).is_integer() else kunefe_total_sum
-        
-        # Search for ŞERBET only in branch span columns (min_c to max_c)
-        for r in range(1, ws.max_row + 1):
-            for c in range(min_c, max_c + 1):
-                    val = ws.cell(row=r, column=c).value
-                    if not isinstance(val, str):
-                        continue
-                    upv = normalize_text(val)
-                    if "SERBET" in upv or "ŞERBET" in upv:
-                        # CRITICAL: Clean existing cell value to remove old qty/unit before appending new value
-                        text_clean = clean_text_from_quantities(val)
-                        unit_text = "KL." if force_koli_all else "KL."
-                        new_text = append_text_with_space(text_clean, f"{fmt_qty} {unit_text}")
-                        try:
-                            safe_write(ws, r, c, new_text)
-                        except Exception:
-                            try:
-                                ws.cell(row=r, column=c).value = new_text
-                            except Exception:
-                                pass
-                        if debug:
-                            print(f"[DEBUG] ŞERBET TEXT WRITE r={r} c={c} val='{new_text}' (branch column)")
-                        # Update only the first match
-                        break
-            else:
-                continue
-            break    
+    if kunefe_total_sum and text_updates_enabled:
+        fmt_qty = qty_text(kunefe_total_sum)
+        update_first_text_cell(
+            lambda upv: "SERBET" in upv or "ŞERBET" in upv,
+            lambda text: append_text_with_space(text, f"{fmt_qty} KL."),
+            "ŞERBET",
+        )
 
     # Update MEYVELI ROKOKO text cell if present and total > 0
-    if rokoko_total and ws is not None and min_c and max_c:
-        fmt_qty = int(rokoko_total) if float(rokoko_total).is_integer() else rokoko_total
-        
-        # Search for ROKOKO only in branch span columns (min_c to max_c)
-        for r in range(1, ws.max_row + 1):
-            for c in range(min_c, max_c + 1):
-                    val = ws.cell(row=r, column=c).value
-                    if not isinstance(val, str):
-                        continue
-                    upv = normalize_text(val)
-                    if "ROKOKO" in upv:
-                        # CRITICAL: Clean existing cell value to remove old qty/unit before formatting
-                        text_clean = clean_text_from_quantities(val)
-                        unit_text = "KL." if force_koli_all else "SPT."
-                        new_text = format_text_with_qty(text_clean, f"{fmt_qty} {unit_text}")
-                        try:
-                            safe_write(ws, r, c, new_text)
-                        except Exception:
-                            try:
-                                ws.cell(row=r, column=c).value = new_text
-                            except Exception:
-                                pass
-                        if debug:
-                            print(f"[DEBUG] MEYVELI ROKOKO TEXT WRITE r={r} c={c} val='{new_text}' (branch column)")
-                        # Update only the first match
-                        break
-            else:
-                continue
-            break
+    if rokoko_total and text_updates_enabled:
+        fmt_qty = qty_text(rokoko_total)
+        unit_text = "KL." if force_koli_all else "SPT."
+        update_first_text_cell(
+            lambda upv: "ROKOKO" in upv,
+            lambda text: format_text_with_qty(text, f"{fmt_qty} {unit_text}"),
+            "MEYVELI ROKOKO",
+        )
 
-    if ekler_total_sum and ws is not None and min_c and max_c:
-        fmt_qty = int(ekler_total_sum) if float(ekler_total_sum).is_integer() else ekler_total_sum
-        
-        # Search for EKLER only in branch span columns (min_c to max_c)
-        for r in range(1, ws.max_row + 1):
-            for c in range(min_c, max_c + 1):
-                    val = ws.cell(row=r, column=c).value
-                    if not isinstance(val, str):
-                        continue
-                    upv = normalize_text(val)
-                    if "EKLER" in upv:
-                        # CRITICAL: Clean existing cell value to remove old qty/unit before formatting
-                        text_clean = clean_text_from_quantities(val)
-                        unit_text = "KL." if force_koli_all else "SPT."
-                        new_text = format_text_with_qty(text_clean, f"{fmt_qty} {unit_text}")
-                        try:
-                            safe_write(ws, r, c, new_text)
-                        except Exception:
-                            try:
-                                ws.cell(row=r, column=c).value = new_text
-                            except Exception:
-                                pass
-                        if debug:
-                            print(f"[DEBUG] EKLER TEXT WRITE r={r} c={c} val='{new_text}' (branch column)")
-                        # Update only the first match
-                        break
-            else:
-                continue
-            break
+    if ekler_total_sum and text_updates_enabled:
+        fmt_qty = qty_text(ekler_total_sum)
+        unit_text = "KL." if force_koli_all else "SPT."
+        update_first_text_cell(
+            lambda upv: "EKLER" in upv,
+            lambda text: format_text_with_qty(text, f"{fmt_qty} {unit_text}"),
+            "EKLER",
+        )
 
-    if eksi_mayali_total_sum and ws is not None and min_c and max_c:
-        fmt_qty = int(eksi_mayali_total_sum) if float(eksi_mayali_total_sum).is_integer() else eksi_mayali_total_sum
-        
-        # Search for EKŞİ MAYALI KÖY EKMEĞİ or fallback name
-        for r in range(1, ws.max_row + 1):
-            for c in range(min_c, max_c + 1):
-                    val = ws.cell(row=r, column=c).value
-                    if not isinstance(val, str):
-                        continue
-                    upv = normalize_text(val)
-                    if "EKSI MAYALI" in upv and ("KOY EKMEG" in upv or "TOST EKMEG" in upv):
-                        # CRITICAL: Clean existing cell value to remove old qty/unit before formatting
-                        text_clean = clean_text_from_quantities(val)
-                        unit_text = "KL."
-                        new_text = append_text_with_space(text_clean, f"{fmt_qty} {unit_text}")
-                        try:
-                            safe_write(ws, r, c, new_text)
-                        except Exception:
-                            try:
-                                ws.cell(row=r, column=c).value = new_text
-                            except Exception:
-                                pass
-                        if debug:
-                            print(f"[DEBUG] EKSİ MAYALI KÖY EKMEĞİ TEXT WRITE r={r} c={c} val='{new_text}' (branch column)")
-                        # Update only the first match
-                        break
-            else:
-                continue
-            break
+    # EKŞİ MAYALI KÖY EKMEĞİ or fallback name
+    if eksi_mayali_total_sum and text_updates_enabled:
+        fmt_qty = qty_text(eksi_mayali_total_sum)
+        update_first_text_cell(
+            lambda upv: "EKSI MAYALI" in upv and ("KOY EKMEG" in upv or "TOST EKMEG" in upv),
+            lambda text: append_text_with_space(text, f"{fmt_qty} KL."),
+            "EKSİ MAYALI KÖY EKMEĞİ",
+        )
 
+    drop_blank_cells(wb)
     wb.save(output_path)
     # If forced hits were collected, print a concise report for the trial
     if forced_hits:
@@ -2838,6 +2974,26 @@ def process_donuk_csv(csv_path: str, output_path: str = "sevkiyat_donuk.xlsx", s
     print(f"[DONUK] Dondurmalar yazıldı: {len(aggreg)} hücre, {matched} kalem -> {output_path}")
     return (matched, 0)
 
+# ----------------------- TATLI: CSV name / variant parsing -----------------------
+
+_RE_TATLI_42 = re.compile(r"\b42\b|1X?42")
+_RE_TATLI_NXN = re.compile(r"\d+X\d+")
+_RE_LOJ_PREFIX = re.compile(r"^LOJIST[Iİ]K\*")
+_RE_LOJ_ANY_PREFIX = re.compile(r"^LOJ\S*\*")
+_RE_EKERPARE = re.compile(r"^I?EKERPARE")
+_RE_BRACES = re.compile(r"\{.*?\}")
+_RE_TATLI_JUNK = re.compile(r"[^\w\s\*\(\)]")
+_RE_NAME_VARIANT = re.compile(r"^(.*?)\s*\(([^)]+)\)")
+_RE_TEPSI_WORD = re.compile(r"\bTEPS[Iİ]\b")
+_RE_42L = re.compile(r"42 ?L[Iİ]?")
+_RE_1X42 = re.compile(r"1\*?42")
+_TATLI_VARIANT_SUFFIXES = ("TEKLI PAKET", "TEKLI", "PAKET", "KASE", "BUYUK", "ADET", "TEPSI")
+
+# Tatlı write units: TEPSİ/PKT. products, KAYMAK (PKT.), and the first five ADET products ("ad")
+_TATLI_TEPSI_PKT_NAMES = frozenset({"EKMEKKADAYIFI", "EKMEK KADAYIFI", "SEKERPARE"})
+_TATLI_KAYMAK_NAMES = frozenset({"KAYMAK", "KAYMAKTAVA"})
+_TATLI_FIRST_FIVE_ADET = frozenset({"KAZANDIBI", "ANTEP FISTIKLI KAZANDIBI", "TAVUK GOGSU", "TAVUK GOGSU KAZ", "SAKIZLI MUHALLEBI"})
+
 # Minimal placeholder for compatibility
 
 def process_csv(csv_path: str, output_path: str = "sevkiyat_tatlı.xlsx", sheet_name: Optional[str] = None) -> Tuple[int, int]:
@@ -2845,6 +3001,8 @@ def process_csv(csv_path: str, output_path: str = "sevkiyat_tatlı.xlsx", sheet_
     # using the branch columns (TEPSI/ADET) and product rows discovered at runtime.
     # CRITICAL: sheet_name parameter for multi-day branch support
     # Helpers specific to Tatlı flow
+    # tatli_eslesir her (Excel, CSV) çifti için iki adı da sıkıştırır; ad başına bir kez yapılır
+    @functools.lru_cache(maxsize=None)
     def normalize_text_strict(s):
         return normalize_text(s).replace(" ", "")
 
@@ -2853,8 +3011,8 @@ def process_csv(csv_path: str, output_path: str = "sevkiyat_tatlı.xlsx", sheet_
             return ""
         v = str(v).upper()
         v = v.replace("*", "X")
-        v = v.replace("İ", "I").replace("Ş", "S").replace("Ğ", "G").replace("Ü", "U").replace("Ö", "O").replace("Ç", "C")
-        v = v.replace("BÜYÜK", "BUYUK").replace("EKONOMIK PAKET", "BUYUK").replace("EKONOMIKPAKET", "BUYUK")
+        v = v.translate(_TR_TABLE)
+        v = v.replace("EKONOMIK PAKET", "BUYUK").replace("EKONOMIKPAKET", "BUYUK")
         v = v.replace("TEKLIPAKET", "PAKET").replace("TEKLI PAKET", "PAKET")
         if product_name in ("EKMEK KADAYIFI", "SEKERPARE"):
             return "ADET"
@@ -2870,7 +3028,7 @@ def process_csv(csv_path: str, output_path: str = "sevkiyat_tatlı.xlsx", sheet_
             if ("KL_" in v or "TP_" in v) and "_AD" not in v:
                 return "TEPSI"
         
-        if "TEPSI" in v or "TEPSİ" in v or re.search(r"\b42\b", v) or re.search(r"1X?42", v):
+        if "TEPSI" in v or _RE_TATLI_42.search(v):
             return "TEPSI"
         # CSV'den gelen "AD" birimini ADET olarak normalize et
         if v == "AD":
@@ -2883,47 +3041,47 @@ def process_csv(csv_path: str, output_path: str = "sevkiyat_tatlı.xlsx", sheet_
             return "TEKLI"
         if "PAKET" in v:
             return "PAKET"
-        if re.search(r"\d+X\d+", v) or "ADET" in v or re.search(r"PK", v) or "GR" in v:
+        if _RE_TATLI_NXN.search(v) or "ADET" in v or "PK" in v or "GR" in v:
             return "ADET"
-        return re.sub(r"[^\w\s]", "", v).strip()
+        return _RE_PUNCT.sub("", v).strip()
 
     def split_tatli_and_variant(s):
         s = str(s or "")
         s = unicodedata.normalize("NFKD", s).upper()
-        s = s.replace("İ", "I").replace("Ş", "S").replace("Ğ", "G").replace("Ü", "U").replace("Ö", "O").replace("Ç", "C")
+        s = s.translate(_TR_TABLE)
         # Remove LOJISTIK* prefix (tolerant to minor corruption)
-        s = re.sub(r"^LOJIST[Iİ]K\*", "", s)
-        s = re.sub(r"^LOJ\S*\*", "", s)
+        s = _RE_LOJ_PREFIX.sub("", s)
+        s = _RE_LOJ_ANY_PREFIX.sub("", s)
         # Repair possible SEKERPARE corruption (e.g. IEKERPARE)
-        if re.match(r"^I?EKERPARE", s):
-            s = re.sub(r"^I?EKERPARE", "SEKERPARE", s)
-        s = re.sub(r"\{.*?\}", "", s)
-        s = re.sub(r"[^\w\s\*\(\)]", "", s)
-        s = re.sub(r"\s+", " ", s)
+        s = _RE_EKERPARE.sub("SEKERPARE", s)
+        s = _RE_BRACES.sub("", s)
+        s = _RE_TATLI_JUNK.sub("", s)
+        s = _RE_WS.sub(" ", s)
         s = s.strip()
-        m = re.match(r"^(.*?)\s*\(([^)]+)\)", s)
+        m = _RE_NAME_VARIANT.match(s)
         if m:
             ana_ad = m.group(1).strip()
             varyant = m.group(2).strip()
         else:
             ana_ad = s
             varyant = ""
-        varyant_kelimeler = ["TEKLI PAKET", "TEKLI", "PAKET", "KASE", "BUYUK", "ADET", "TEPSI"]
-        for kelime in varyant_kelimeler:
+        for kelime in _TATLI_VARIANT_SUFFIXES:
             if ana_ad.endswith(" " + kelime):
                 ana_ad = ana_ad[:-(len(kelime)+1)].strip()
                 varyant = kelime
             elif ana_ad.endswith(kelime):
                 ana_ad = ana_ad[:-(len(kelime))].strip()
                 varyant = kelime
-        if re.search(r"\bTEPS[Iİ]\b", ana_ad) or re.search(r"42 ?L[Iİ]?", ana_ad) or re.search(r"1\*?42", ana_ad):
-            ana_ad = re.sub(r"\bTEPS[Iİ]\b", "", ana_ad)
-            ana_ad = re.sub(r"42 ?L[Iİ]?", "", ana_ad)
-            ana_ad = re.sub(r"1\*?42", "", ana_ad)
+        if _RE_TEPSI_WORD.search(ana_ad) or _RE_42L.search(ana_ad) or _RE_1X42.search(ana_ad):
+            ana_ad = _RE_TEPSI_WORD.sub("", ana_ad)
+            ana_ad = _RE_42L.sub("", ana_ad)
+            ana_ad = _RE_1X42.sub("", ana_ad)
             ana_ad = ana_ad.strip()
             varyant = "TEPSI"
         return ana_ad.strip(), varyant.strip()
 
+    # Eşleştiriciler saf fonksiyonlar; aynı (excel, csv) çifti birçok hücrede tekrar sorulur
+    @functools.lru_cache(maxsize=None)
     def tatli_eslesir(excel_ad, csv_ad):
         if excel_ad == csv_ad:
             return True
@@ -2995,6 +3153,7 @@ def process_csv(csv_path: str, output_path: str = "sevkiyat_tatlı.xlsx", sheet_
             return True
         return False
 
+    @functools.lru_cache(maxsize=None)
     def varyant_eslesir(excel_v, csv_v):
         if excel_v == csv_v:
             return True
@@ -3006,15 +3165,13 @@ def process_csv(csv_path: str, output_path: str = "sevkiyat_tatlı.xlsx", sheet_
             return csv_v in ("", "ADET")
         return excel_v == csv_v
 
-    # CSV oku (eski davranışla uyumlu header toleransı)
-    try:
-        df = pd.read_csv(csv_path, encoding="utf-8", delimiter=",", header=2)
-    except Exception:
-        df = pd.read_csv(csv_path, encoding="utf-8", delimiter=",", header=0)
+    # CSV oku (eski davranışla uyumlu header toleransı); yalnızca stok/miktar/grup/birim sütunları
+    df = read_csv(csv_path, usecols=order_columns)
 
-    stok_col = find_col(df, ["STOK KODU", "STOKKODU", "KOD"]) or "STOK KODU"
-    miktar_col = find_col(df, ["MIKTAR", "MİKTAR", "ADET"]) or "MIKTAR"
-    grup_col = find_col(df, ["GRUP", "KATEGORI", "KATEGORI ADI"]) or "GRUP"
+    col_index = build_col_index(df)
+    stok_col = find_col(col_index, STOK_COL_CANDIDATES) or "STOK KODU"
+    miktar_col = find_col(col_index, MIKTAR_COL_CANDIDATES) or "MIKTAR"
+    grup_col = find_col(col_index, GRUP_COL_CANDIDATES) or "GRUP"
 
     # Extract branch name from CSV with priority: inner (primary) then outer (fallback)
     sube_primary_raw, sube_fallback_raw = read_branch_from_file(csv_path)
@@ -3058,6 +3215,20 @@ def process_csv(csv_path: str, output_path: str = "sevkiyat_tatlı.xlsx", sheet_
         sheets_to_search = wb.worksheets
     
     # Helper function for branch matching with exact match priority
+    # Row-2 branch headers per sheet: normalized name -> TEPSI column (ADET is 2 to the right).
+    # Read once per sheet and shared by the primary/fallback and exact/partial passes.
+    branch_header_cache: Dict[str, Dict[str, int]] = {}
+
+    def branch_headers(w) -> Dict[str, int]:
+        subeler = branch_header_cache.get(w.title)
+        if subeler is None:
+            subeler = {}
+            for cell in w[2][1:]:  # row=2, columns after first
+                if cell.value:
+                    subeler[normalize_text(cell.value)] = cell.column
+            branch_header_cache[w.title] = subeler
+        return subeler
+
     def find_branch_columns(branch_norm: str, branch_display: str, sheets: list):
         """Find branch columns with exact match priority (avoids FOLKART matching FOLKART VEGA)"""
         if not branch_norm:
@@ -3065,37 +3236,15 @@ def process_csv(csv_path: str, output_path: str = "sevkiyat_tatlı.xlsx", sheet_
         
         # PASS 1: Exact matches only
         for w in sheets:
-            subeler = {}
-            for cell in w[2][1:]:  # row=2, columns after first
-                if cell.value:
-                    sname = normalize_text(cell.value)
-                    subeler[sname] = {
-                        "tepsi": cell.column,
-                        "tepsi_2": cell.column + 1,
-                        "adet": cell.column + 2,
-                        "adet_2": cell.column + 3,
-                    }
-            # Exact match pass
-            for sname, cols in subeler.items():
-                if sname == branch_norm:  # Exact match only
-                    return w, cols["tepsi"], cols["adet"], branch_display
+            col = branch_headers(w).get(branch_norm)
+            if col:
+                return w, col, col + 2, branch_display
         
         # PASS 2: Partial matches (backward compatibility)
         for w in sheets:
-            subeler = {}
-            for cell in w[2][1:]:
-                if cell.value:
-                    sname = normalize_text(cell.value)
-                    subeler[sname] = {
-                        "tepsi": cell.column,
-                        "tepsi_2": cell.column + 1,
-                        "adet": cell.column + 2,
-                        "adet_2": cell.column + 3,
-                    }
-            # Partial match pass
-            for sname, cols in subeler.items():
+            for sname, col in branch_headers(w).items():
                 if branch_norm in sname or sname in branch_norm:
-                    return w, cols["tepsi"], cols["adet"], branch_display
+                    return w, col, col + 2, branch_display
         
         return None, None, None, None
     
@@ -3118,12 +3267,7 @@ def process_csv(csv_path: str, output_path: str = "sevkiyat_tatlı.xlsx", sheet_
     ws.cell(row=2, column=1).value = datetime.today().strftime('%d.%m.%Y')
 
     # Tüm merge'leri geçici olarak aç
-    original_merged = [str(r) for r in ws.merged_cells.ranges]
-    for r in original_merged:
-        try:
-            ws.unmerge_cells(r)
-        except Exception:
-            pass
+    original_merged = unmerge_all(ws)
 
     # Excel tarafındaki tatlı ürünleri ve hedef hücreleri indexle
     tatli_cells: Dict[Tuple[str, str], Tuple[int, int]] = {}
@@ -3133,12 +3277,13 @@ def process_csv(csv_path: str, output_path: str = "sevkiyat_tatlı.xlsx", sheet_
         if not ana_cell.value:
             continue
         ana_ad, varyant = split_tatli_and_variant(ana_cell.value)
-        ana_ad_norm = normalize_text(ana_ad)
+        # Excel ve CSV adları/varyantları intern edilir: eşleşme tablolarındaki karşılaştırmalar kimlikle kısalır
+        ana_ad_norm = sys.intern(normalize_text(ana_ad))
         if not ana_ad_norm:
             continue
         if any(ana_ad_norm.startswith(k) or ana_ad_norm == k for k in skip_keywords):
             continue
-        varyant_norm = normalize_variant(varyant)
+        varyant_norm = sys.intern(normalize_variant(varyant))
         if "MIKTAR" in ana_ad_norm or "ADET" in ana_ad_norm or "TEPSI" in ana_ad_norm:
             continue
         if ana_cell.row <= 7:
@@ -3150,175 +3295,127 @@ def process_csv(csv_path: str, output_path: str = "sevkiyat_tatlı.xlsx", sheet_
             else:
                 tatli_cells[(ana_ad_norm, varyant_norm or "ADET")] = (ana_cell.row, col_tepsi)
 
-    # CSV'den TATLI grubu ürünleri topla: {ana_ad_norm: [(varyant_norm, miktar), ...]}
-    csv_index: Dict[str, list] = {}
-    for _, r in df.iterrows():
+    # CSV'den TATLI grubu ürünleri topla: {ana_ad_norm: {varyant_norm: ilk miktar}}
+    # Adlar ve varyantlar CSV'deki ilk görülme sırasıyla. Eşleşme yalnızca varyanta bakar ve ilk uyan satırı
+    # yazar; aynı varyantın sonraki satırları hiçbir zaman seçilmediğinden saklanmaz.
+    csv_variants: Dict[str, Dict[str, object]] = {}
+    # Only TATLI-group rows are indexed: filter them column-wise (no group column -> none)
+    if grup_col in df.columns:
+        tatli_df = df[normalize_series(df[grup_col]) == "TATLI"]
+    else:
+        tatli_df = df.iloc[0:0]
+    # Plain tuples instead of a Series per row; columns are addressed by position
+    col_pos = {c: i for i, c in enumerate(df.columns)}
+    birim_pos = col_pos.get("Birim", col_pos.get("BIRIM"))
+    stok_pos = col_pos[stok_col] if len(tatli_df) else None
+    miktar_pos = col_pos[miktar_col] if len(tatli_df) else None
+    # Aynı stok adı/birim çifti birçok satırda tekrarlar: ad/varyant ayrıştırması çift başına bir kez yapılır
+    row_keys: Dict[tuple, Tuple[str, str]] = {}
+    for r in tatli_df.itertuples(index=False, name=None):
+        stok_name = r[stok_pos]
+        birim_raw = r[birim_pos] if birim_pos is not None else ""
         try:
-            g = normalize_text(str(r[grup_col]))
-        except Exception:
-            g = ""
-        if g != "TATLI":
-            continue
-        stok_name = r[stok_col]
-        ana_ad, varyant = split_tatli_and_variant(stok_name)
-        ana_ad_norm = normalize_text(ana_ad)
-        
-        # CRITICAL: Check "Birim" column for unit information (e.g., "AD" for ADET)
-        # ONLY use Birim if no variant found in product name itself
-        # This prevents KL_42_AD from overriding "(42 Lİ)" in product name
-        if not varyant:
-            try:
-                birim_val = str(r.get("Birim", r.get("BIRIM", ""))).strip()
+            ana_ad_norm, varyant_norm = row_keys[(stok_name, birim_raw)]
+        except KeyError:
+            ana_ad, varyant = split_tatli_and_variant(stok_name)
+            ana_ad_norm = sys.intern(normalize_text(ana_ad))
+
+            # CRITICAL: Check "Birim" column for unit information (e.g., "AD" for ADET)
+            # ONLY use Birim if no variant found in product name itself
+            # This prevents KL_42_AD from overriding "(42 Lİ)" in product name
+            if not varyant:
+                birim_val = str(birim_raw).strip()
                 # Only use Birim if it's a simple unit code (AD, KG, etc.), not composite codes
                 if birim_val and not any(sep in birim_val for sep in ['_', 'KL', 'TP']):
                     varyant = birim_val
-            except:
-                pass
-        
-        varyant_norm = normalize_variant(varyant, product_name=ana_ad_norm)
-        try:
-            mikt = float(str(r[miktar_col]).replace(",", "."))
-        except Exception:
-            mikt = r[miktar_col]
-        csv_index.setdefault(ana_ad_norm, []).append((varyant_norm, mikt))
 
-    # Önce hedef hücreleri temizle (eski alışkanlıkla: "-")
-    for (a, v), (rr, cc) in tatli_cells.items():
+            varyant_norm = sys.intern(normalize_variant(varyant, product_name=ana_ad_norm))
+            row_keys[(stok_name, birim_raw)] = (ana_ad_norm, varyant_norm)
+        variants = csv_variants.setdefault(ana_ad_norm, {})
+        if varyant_norm in variants:
+            continue
+        mikt_raw = r[miktar_pos]
+        mikt = parse_qty(mikt_raw)
+        if mikt is None:
+            mikt = mikt_raw
+        variants[varyant_norm] = mikt
+
+    # EKMEK KADAYIFI ve ŞEKERPARE Kayseri-Sivas/Adana sayfalarında "PKT.", diğerlerinde "TEPSİ" yazılır
+    ws_title_norm = normalize_text(ws.title)
+    tepsi_unit = "PKT." if ("KAYSERI" in ws_title_norm and "SIVAS" in ws_title_norm) or ("ADANA" in ws_title_norm) else "TEPSİ"
+
+    def tatli_varyant_uyar(excel_ad, excel_var, csv_var):
+        # EKMEK KADAYIFI/ŞEKERPARE ADET hücresi CSV'deki TEPSİ satırını da kabul eder
+        return varyant_eslesir(excel_var, csv_var) or (
+            excel_var == "ADET" and csv_var == "TEPSI" and excel_ad in _TATLI_TEPSI_PKT_NAMES
+        )
+
+    def tatli_hucre_degeri(excel_ad, excel_var, csv_miktar):
+        if excel_ad in _TATLI_TEPSI_PKT_NAMES:
+            unit = tepsi_unit
+        elif excel_ad in _TATLI_KAYMAK_NAMES:
+            # KAYMAK için "PKT." ekle
+            unit = "PKT."
+        elif excel_var == "ADET" and excel_ad in _TATLI_FIRST_FIVE_ADET:
+            # Add 'ad' suffix for first five ADET products
+            unit = "ad"
+        else:
+            return csv_miktar
         try:
-            ws.cell(row=rr, column=cc).value = "-"
-        except Exception:
-            # nadir merge-hata güvenliği
-            try:
-                ws.unmerge_cells(start_row=rr, start_column=cc, end_row=rr, end_column=cc)
-                ws.cell(row=rr, column=cc).value = "-"
-            except Exception:
-                pass
+            fmt_qty = int(csv_miktar) if float(csv_miktar).is_integer() else csv_miktar
+        except (TypeError, ValueError):
+            fmt_qty = csv_miktar
+        return f"{fmt_qty} {unit}"
 
     matched = 0
-    # Yazma: önce doğrudan ad, sonra gevşek eşleşme
+    # Gevşek eşleşme adayları (Excel adı -> tatli_eslesir ile eşleşen CSV adları, CSV sırasıyla).
+    # Aynı ad birden çok varyant hücresinde geçtiği için her (Excel, CSV) çifti bir kez denenir.
+    fuzzy_matches: Dict[str, list] = {}
+    # Yazma: önce doğrudan ad, sonra gevşek eşleşme; eşleşmeyen hedef "-" ile temizlenir (eski alışkanlık).
+    # Merge'ler yukarıda açıldığı için hedeflerin hiçbiri MergedCell değildir: her hücreye tek yazım yapılır.
     for (excel_ad, excel_var), (rr, cc) in tatli_cells.items():
         yazildi = False
-        if excel_ad in csv_index:
-            for csv_var, csv_miktar in csv_index[excel_ad]:
-                if varyant_eslesir(excel_var, csv_var):
-                    # EKMEK KADAYIFI ve ŞEKERPARE için "PKT." (Kayseri-Sivas/Adana) veya "TEPSİ" (diğer) ekle
-                    if excel_ad in ("EKMEKKADAYIFI", "EKMEK KADAYIFI", "SEKERPARE"):
-                        try:
-                            fmt_qty = int(csv_miktar) if float(csv_miktar).is_integer() else csv_miktar
-                        except:
-                            fmt_qty = csv_miktar
-                        # Check if this is Kayseri-Sivas or Adana sheet
-                        ws_title_norm = normalize_text(ws.title if ws else "")
-                        if ("KAYSERI" in ws_title_norm and "SIVAS" in ws_title_norm) or ("ADANA" in ws_title_norm):
-                            ws.cell(row=rr, column=cc).value = f"{fmt_qty} PKT."
-                        else:
-                            ws.cell(row=rr, column=cc).value = f"{fmt_qty} TEPSİ"
-                    # KAYMAK için "PKT." ekle
-                    elif excel_ad in ("KAYMAK", "KAYMAKTAVA"):
-                        try:
-                            fmt_qty = int(csv_miktar) if float(csv_miktar).is_integer() else csv_miktar
-                        except:
-                            fmt_qty = csv_miktar
-                        ws.cell(row=rr, column=cc).value = f"{fmt_qty} PKT."
-                    else:
-                        # Add 'ad' suffix for first five ADET products
-                        first_five = {"KAZANDIBI", "ANTEP FISTIKLI KAZANDIBI", "TAVUK GOGSU", "TAVUK GOGSU KAZ", "SAKIZLI MUHALLEBI"}
-                        if excel_var == "ADET" and excel_ad in first_five:
-                            try:
-                                fmt_qty = int(csv_miktar) if float(csv_miktar).is_integer() else csv_miktar
-                            except:
-                                fmt_qty = csv_miktar
-                            ws.cell(row=rr, column=cc).value = f"{fmt_qty} ad"
-                        else:
-                            ws.cell(row=rr, column=cc).value = csv_miktar
-                    matched += 1
-                    yazildi = True
-                    break
-                if excel_var == "ADET" and csv_var == "TEPSI" and excel_ad in ("EKMEKKADAYIFI", "EKMEK KADAYIFI", "SEKERPARE"):
-                    # EKMEK KADAYIFI ve ŞEKERPARE için "PKT." (Kayseri-Sivas/Adana) veya "TEPSİ" (diğer) ekle
-                    try:
-                        fmt_qty = int(csv_miktar) if float(csv_miktar).is_integer() else csv_miktar
-                    except:
-                        fmt_qty = csv_miktar
-                    # Check if this is Kayseri-Sivas or Adana sheet
-                    ws_title_norm = normalize_text(ws.title if ws else "")
-                    if ("KAYSERI" in ws_title_norm and "SIVAS" in ws_title_norm) or ("ADANA" in ws_title_norm):
-                        ws.cell(row=rr, column=cc).value = f"{fmt_qty} PKT."
-                    else:
-                        ws.cell(row=rr, column=cc).value = f"{fmt_qty} TEPSİ"
+        deger = "-"
+        variants = csv_variants.get(excel_ad)
+        if variants is not None:
+            # İlk uyan varyantın ilk miktarı yazılır. Yalnızca ADET/boş varyant gevşek eşleşir ("" <-> ADET, ADET <- TEPSİ);
+            # diğerleri için tek aday birebir aynı varyanttır.
+            if excel_var in ("ADET", ""):
+                matches = variants.items()
+            elif excel_var in variants:
+                matches = ((excel_var, variants[excel_var]),)
+            else:
+                matches = ()
+            for csv_var, csv_miktar in matches:
+                if tatli_varyant_uyar(excel_ad, excel_var, csv_var):
+                    deger = tatli_hucre_degeri(excel_ad, excel_var, csv_miktar)
                     matched += 1
                     yazildi = True
                     break
         if not yazildi:
-            for csv_name, entries in csv_index.items():
-                if tatli_eslesir(excel_ad, csv_name):
-                    for csv_var, csv_miktar in entries:
-                        if varyant_eslesir(excel_var, csv_var):
-                            # EKMEK KADAYIFI ve ŞEKERPARE için "PKT." (Kayseri-Sivas/Adana) veya "TEPSİ" (diğer) ekle
-                            if excel_ad in ("EKMEKKADAYIFI", "EKMEK KADAYIFI", "SEKERPARE"):
-                                try:
-                                    fmt_qty = int(csv_miktar) if float(csv_miktar).is_integer() else csv_miktar
-                                except:
-                                    fmt_qty = csv_miktar
-                                # Check if this is Kayseri-Sivas or Adana sheet
-                                ws_title_norm = normalize_text(ws.title if ws else "")
-                                if ("KAYSERI" in ws_title_norm and "SIVAS" in ws_title_norm) or ("ADANA" in ws_title_norm):
-                                    ws.cell(row=rr, column=cc).value = f"{fmt_qty} PKT."
-                                else:
-                                    ws.cell(row=rr, column=cc).value = f"{fmt_qty} TEPSİ"
-                            # KAYMAK için "PKT." ekle
-                            elif excel_ad in ("KAYMAK", "KAYMAKTAVA"):
-                                try:
-                                    fmt_qty = int(csv_miktar) if float(csv_miktar).is_integer() else csv_miktar
-                                except:
-                                    fmt_qty = csv_miktar
-                                ws.cell(row=rr, column=cc).value = f"{fmt_qty} PKT."
-                            else:
-                                first_five = {"KAZANDIBI", "ANTEP FISTIKLI KAZANDIBI", "TAVUK GOGSU", "TAVUK GOGSU KAZ", "SAKIZLI MUHALLEBI"}
-                                if excel_var == "ADET" and excel_ad in first_five:
-                                    try:
-                                        fmt_qty = int(csv_miktar) if float(csv_miktar).is_integer() else csv_miktar
-                                    except:
-                                        fmt_qty = csv_miktar
-                                    ws.cell(row=rr, column=cc).value = f"{fmt_qty} ad"
-                                else:
-                                    ws.cell(row=rr, column=cc).value = csv_miktar
-                            matched += 1
-                            yazildi = True
-                            break
-                        if excel_var == "ADET" and csv_var == "TEPSI" and excel_ad in ("EKMEKKADAYIFI", "EKMEK KADAYIFI", "SEKERPARE"):
-                            # EKMEK KADAYIFI ve ŞEKERPARE için "PKT." (Kayseri-Sivas/Adana) veya "TEPSİ" (diğer) ekle
-                            try:
-                                fmt_qty = int(csv_miktar) if float(csv_miktar).is_integer() else csv_miktar
-                            except:
-                                fmt_qty = csv_miktar
-                            # Check if this is Kayseri-Sivas or Adana sheet
-                            ws_title_norm = normalize_text(ws.title if ws else "")
-                            if ("KAYSERI" in ws_title_norm and "SIVAS" in ws_title_norm) or ("ADANA" in ws_title_norm):
-                                ws.cell(row=rr, column=cc).value = f"{fmt_qty} PKT."
-                            else:
-                                ws.cell(row=rr, column=cc).value = f"{fmt_qty} TEPSİ"
-                            matched += 1
-                            yazildi = True
-                            break
-                        if excel_ad in ("KAYMAK", "KAYMAKTAVA") and tatli_eslesir(excel_ad, csv_name):
-                            try:
-                                fmt_qty = int(csv_miktar) if float(csv_miktar).is_integer() else csv_miktar
-                            except:
-                                fmt_qty = csv_miktar
-                            ws.cell(row=rr, column=cc).value = f"{fmt_qty} PKT."
-                            matched += 1
-                            yazildi = True
-                            break
-                    if yazildi:
+            # KAYMAK hücresi eşleşen adın ilk satırını varyanta bakmadan alır
+            any_variant = excel_ad in _TATLI_KAYMAK_NAMES
+            candidates = fuzzy_matches.get(excel_ad)
+            if candidates is None:
+                # Adın kendi satırları doğrudan geçişte aynı koşulla denendi; KAYMAK dışında tekrar taranmaz
+                candidates = [
+                    csv_name for csv_name in csv_variants
+                    if (any_variant or csv_name != excel_ad) and tatli_eslesir(excel_ad, csv_name)
+                ]
+                fuzzy_matches[excel_ad] = candidates
+            for csv_name in candidates:
+                for csv_var, csv_miktar in csv_variants[csv_name].items():
+                    if any_variant or tatli_varyant_uyar(excel_ad, excel_var, csv_var):
+                        deger = tatli_hucre_degeri(excel_ad, excel_var, csv_miktar)
+                        matched += 1
+                        yazildi = True
                         break
+                if yazildi:
+                    break
+        ws.cell(row=rr, column=cc).value = deger
 
     # Merge'leri eski haline getir
-    for r in original_merged:
-        try:
-            ws.merge_cells(r)
-        except Exception:
-            pass
+    merge_all(ws, original_merged)
 
     # ==================== SEPET HESAPLAMA ====================
     # Calculate basket (sepet) count for each branch based on product quantities
@@ -3431,48 +3528,52 @@ def process_csv(csv_path: str, output_path: str = "sevkiyat_tatlı.xlsx", sheet_
     # Products to exclude from basket calculation
     excluded_products = ["EKMEKKADAYIFI", "SEKERPARE"]
     
+    # Product rows are the same for every branch: resolve each row's product key and
+    # division value from column A once, then only read the branch cells per branch
+    product_rows = []  # (row_idx, division_value, is_first_five)
+    col_a = sheet_values(ws, 3, ws.max_row, 1, 1)
+    for row_idx, (ana_val,) in enumerate(col_a, start=3):
+        if not ana_val:
+            continue
+        
+        # Get product name and variant
+        ana_ad, varyant = split_tatli_and_variant(ana_val)
+        ana_ad_norm = normalize_text(ana_ad)
+        varyant_norm = normalize_variant(varyant)
+        
+        # Skip non-product rows
+        if not ana_ad_norm:
+            continue
+        skip_keywords = ["SIPARIS TARIHI", "SIPARIS ALAN", "TESLIM TARIHI", "TEYID EDEN", "MIKTAR", "ADET", "TEPSI"]
+        if any(k in ana_ad_norm for k in skip_keywords):
+            continue
+        
+        # Build full product key (product + variant)
+        # Remove all spaces from product key to match dictionary keys
+        if varyant_norm and varyant_norm not in ["ADET", "TEPSI"]:
+            product_key = (ana_ad_norm + varyant_norm).replace(" ", "")
+        else:
+            product_key = ana_ad_norm.replace(" ", "")
+        
+        # Skip excluded products (EKMEK KADAYIFI, ŞEKERPARE)
+        if product_key in excluded_products:
+            continue
+        
+        # Get division value for this product
+        division_value = product_divisions.get(product_key)
+        if not division_value:
+            continue  # Skip products without division value
+        
+        # Check if this is one of the first 5 products (has TEPSI column)
+        # Use the normalized product key (no spaces) for comparison
+        product_rows.append((row_idx, division_value, product_key in first_five_products))
+
     # Calculate basket count for each branch
     for sube_name, cols in subeler.items():
         total_baskets = 0.0  # Use float for decimal calculations
         
         # Iterate through all product rows
-        for row_idx in range(3, ws.max_row + 1):
-            ana_cell = ws.cell(row_idx, 1)
-            if not ana_cell.value:
-                continue
-            
-            # Get product name and variant
-            ana_ad, varyant = split_tatli_and_variant(ana_cell.value)
-            ana_ad_norm = normalize_text(ana_ad)
-            varyant_norm = normalize_variant(varyant)
-            
-            # Skip non-product rows
-            if not ana_ad_norm:
-                continue
-            skip_keywords = ["SIPARIS TARIHI", "SIPARIS ALAN", "TESLIM TARIHI", "TEYID EDEN", "MIKTAR", "ADET", "TEPSI"]
-            if any(k in ana_ad_norm for k in skip_keywords):
-                continue
-            
-            # Build full product key (product + variant)
-            # Remove all spaces from product key to match dictionary keys
-            if varyant_norm and varyant_norm not in ["ADET", "TEPSI"]:
-                product_key = (ana_ad_norm + varyant_norm).replace(" ", "")
-            else:
-                product_key = ana_ad_norm.replace(" ", "")
-            
-            # Skip excluded products (EKMEK KADAYIFI, ŞEKERPARE)
-            if product_key in excluded_products:
-                continue
-            
-            # Get division value for this product
-            division_value = product_divisions.get(product_key)
-            if not division_value:
-                continue  # Skip products without division value
-            
-            # Check if this is one of the first 5 products (has TEPSI column)
-            # Use the normalized product key (no spaces) for comparison
-            is_first_five = product_key in first_five_products
-            
+        for row_idx, division_value, is_first_five in product_rows:
             if is_first_five:
                 # For first 5 products: ONLY use ADET column (ignore TEPSI)
                 # Get ADET value and divide
@@ -3519,6 +3620,7 @@ def process_csv(csv_path: str, output_path: str = "sevkiyat_tatlı.xlsx", sheet_
         if final_basket_count > 0:
             safe_write(ws, cols["sepet_row"], cols["sepet_col"], str(final_basket_count) + " sepet")
 
+    drop_blank_cells(wb)
     wb.save(output_path)
     return matched, 0
 
@@ -3529,11 +3631,15 @@ def process_all(csv_path: str,
                 lojistik_output: str = "sevkiyat_lojistik.xlsx",
                 debug: bool = False,
                 force_donuk: Optional[Iterable[str]] = None):
-    # Process TATLI
-    tatli_matched, tatli_unmatched = process_csv(csv_path, output_path=tatli_output)
-    
-    # Process DONUK - accepts an optional iterable of forced donuk candidate names
-    result = process_donuk_csv(csv_path, output_path=donuk_output, debug=debug, force_donuk=force_donuk)
+    try:
+        # Process TATLI
+        tatli_matched, tatli_unmatched = process_csv(csv_path, output_path=tatli_output)
+        
+        # Process DONUK - accepts an optional iterable of forced donuk candidate names
+        result = process_donuk_csv(csv_path, output_path=donuk_output, debug=debug, force_donuk=force_donuk)
+    finally:
+        # the parsed CSV was only shared between the two flows above
+        clear_csv_cache()
     # process_donuk_csv returns (matched, 0) by default; keep compatibility
     if isinstance(result, tuple) or isinstance(result, list):
         donuk_matched = result[0]
@@ -3546,7 +3652,6 @@ def process_all(csv_path: str,
     }
 
 if __name__ == "__main__":
-    import sys
     if len(sys.argv) < 2:
         print("Kullanım: python parse_gptfix.py <csv_yolu> [--debug]")
         raise SystemExit(1)
@@ -1,3 +1,4 @@
+import itertools
 import os
 import sys
 from dataclasses import dataclass
@@ -9,6 +10,13 @@ from openpyxl import Workbook  # pyright: ignore[reportMissingModuleSource]
 from datetime import datetime
 
 # ------------------ Normalization ------------------
+# Turkish -> ASCII table, built once (TextNormalizer.up runs for every cell/branch name)
+TR_MAP = str.maketrans({
+    "ı": "i", "ğ": "g", "ü": "u", "ş": "s", "ö": "o", "ç": "c",
+    "İ": "I", "Ğ": "G", "Ü": "U", "Ş": "S", "Ö": "O", "Ç": "C",
+})
+
+
 class TextNormalizer:
     @staticmethod
     def up(s: Optional[str]) -> str:
@@ -16,11 +24,7 @@ class TextNormalizer:
             return ""
         s = str(s)
         # First apply Turkish character mapping BEFORE normalization
-        tr_map = str.maketrans({
-            "ı": "i", "ğ": "g", "ü": "u", "ş": "s", "ö": "o", "ç": "c",
-            "İ": "I", "Ğ": "G", "Ü": "U", "Ş": "S", "Ö": "O", "Ç": "C",
-        })
-        s = s.translate(tr_map)
+        s = s.translate(TR_MAP)
         s = s.upper()
         # Then normalize unicode
         try:
@@ -260,6 +264,19 @@ class BaseExcelWriter:
         assert self.wb is not None
         self.wb.save(self.output_path)
 
+    def _merge_lookup(self, col: int):
+        """in_merge(r, c) for the row scans down `col`; returns the range's bounds tuple or None."""
+        assert self.ws is not None
+        # bounds are (min_col, min_row, max_col, max_row) but read row-first, as this lookup always has
+        col_merges = [b for b in (mr.bounds for mr in self.ws.merged_cells.ranges) if b[1] <= col <= b[3]]
+
+        def in_merge(r: int, c: int):
+            for min_row, min_col, max_row, max_col in col_merges:
+                if min_row <= r <= max_row and min_col <= c <= max_col:
+                    return (min_row, min_col, max_row, max_col)
+            return None
+        return in_merge
+
     def clear_values(self) -> int:
         # Generic clear: from DATA_START_ROW onward, all sheets, values only (keep formulas and headers)
         assert self.wb is not None
@@ -355,12 +372,7 @@ class LojistikTemplateWriter(BaseExcelWriter):
         assert self.ws is not None
         col = self._find_or_add_branch_col(self._canonical_branch(branch_name))
         # find first empty row below header, skipping merged regions
-        def in_merge(r: int, c: int):
-            for mr in self.ws.merged_cells.ranges:
-                min_row, min_col, max_row, max_col = mr.bounds
-                if min_row <= r <= max_row and min_col <= c <= max_col:
-                    return (min_row, min_col, max_row, max_col)
-            return None
+        in_merge = self._merge_lookup(col)
         row = 2
         while True:
             bounds = in_merge(row, col)
@@ -642,12 +654,7 @@ class ImprovedLojistikWriter(LojistikTemplateWriter):
             try_add_new = True
         
         # Find first empty row below header, skipping merged regions
-        def in_merge(r: int, c: int):
-            for mr in self.ws.merged_cells.ranges:
-                min_row, min_col, max_row, max_col = mr.bounds
-                if min_row <= r <= max_row and min_col <= c <= max_col:
-                    return (min_row, min_col, max_row, max_col)
-            return None
+        in_merge = self._merge_lookup(col)
         
         # Start from row 3 to skip potential headers
         row = 3
@@ -759,29 +766,27 @@ class ShipmentCoordinator:
             - "MUGLA(MARMARIS)" + "Sipariş Notu: içmeler..." -> returns ("İÇMELER", "MARMARIS")
             - "BALÇOVA" -> returns ("BALÇOVA", None)
             """
+            from parse_gptfix import BRANCH_HEADER_LINES
+
             branch_code = None
             order_note = None
             
             try:
                 with open(path, encoding="utf-8") as f:
-                    lines = f.readlines()
-                    
-                    # First pass: Extract branch code
-                    for line in lines:
+                    # Branch code / order note sit in the metadata lines above the table:
+                    # one pass, stop reading as soon as both are known
+                    for line in itertools.islice(f, BRANCH_HEADER_LINES):
                         up = TextNormalizer.up(line)
-                        if "SUBE" in up and ("KODU" in up or "ADI" in up):
+                        if branch_code is None and "SUBE" in up and ("KODU" in up or "ADI" in up):
                             raw = line.split(":", 1)[-1] if ":" in line else line
                             part = raw.split("-", 1)[-1] if "-" in raw else raw
                             part = part.strip().strip('"').strip("'").strip()
                             branch_code = part
-                            break
-                    
-                    # Second pass: Check for order note (Sipariş Notu)
-                    for line in lines:
-                        up = TextNormalizer.up(line)
-                        if "SIPARIS" in up and "NOTU" in up:
+                        # Order note (Sipariş Notu)
+                        if order_note is None and "SIPARIS" in up and "NOTU" in up:
                             note_part = line.split(":", 1)[-1] if ":" in line else ""
                             order_note = note_part.strip()
+                        if branch_code is not None and order_note is not None:
                             break
                     
                     # Process branch code
@@ -1007,20 +1012,24 @@ def clear_tatli_values(path: str) -> int:
         
         # Step 2: Clear row 1 sepet values for each branch
         # Sepet is written to the first column of each branch (TEPSI column)
+        # Row-1 merge masters by column, collected once per sheet instead of per branch
+        # mr.bounds returns (min_col, min_row, max_col, max_row); the named attributes are used here
+        row1_masters = {}
+        for mr in ws.merged_cells.ranges:
+            if mr.min_row <= 1 <= mr.max_row:
+                for c in range(mr.min_col, mr.max_col + 1):
+                    row1_masters.setdefault(c, (mr.min_row, mr.min_col))
         for sube in subeler.values():
             sepet_col = sube["tepsi"]
             
             # Find the cell to clear (handle merged cells properly)
-            # mr.bounds returns (min_col, min_row, max_col, max_row)
             target_cell = ws.cell(row=1, column=sepet_col)
             
             # Check if this cell is part of a merged range
-            for mr in ws.merged_cells.ranges:
-                # bounds format: (min_col, min_row, max_col, max_row)
-                if (mr.min_row <= 1 <= mr.max_row) and (mr.min_col <= sepet_col <= mr.max_col):
-                    # This cell is in a merged range, use the master (top-left)
-                    target_cell = ws.cell(row=mr.min_row, column=mr.min_col)
-                    break
+            master = row1_masters.get(sepet_col)
+            if master:
+                # This cell is in a merged range, use the master (top-left)
+                target_cell = ws.cell(row=master[0], column=master[1])
             
             # Clear value if it exists
             if target_cell.value not in (None, ""):
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell.cell import MergedCell
+from openpyxl.styles import Font
+
+import parse_gptfix as P
+
+
+class DropBlankCellsTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build_workbook(self) -> Workbook:
+        wb = Workbook()
+        ws = wb.active
+        ws["A1"] = "SUBE"
+        ws["B2"].font = Font(bold=True)  # styled but empty
+        ws.merge_cells("C1:D2")
+        ws["C1"] = "TEPSI"
+        # read probes past the content, as the sheet scans do
+        for row in ws.iter_rows(min_row=1, max_row=30, min_col=1, max_col=12):
+            for cell in row:
+                cell.value
+        return wb
+
+    def test_blank_cells_are_dropped(self):
+        wb = self.build_workbook()
+        ws = wb.active
+        self.assertEqual((ws.max_row, ws.max_column), (30, 12))
+        P.drop_blank_cells(wb)
+        self.assertEqual((ws.max_row, ws.max_column), (2, 4))
+
+    def test_content_style_and_merges_survive_save(self):
+        wb = self.build_workbook()
+        P.drop_blank_cells(wb)
+        path = os.path.join(self.tmp.name, "out.xlsx")
+        wb.save(path)
+
+        ws = load_workbook(path).active
+        self.assertEqual(ws.dimensions, "A1:D2")
+        self.assertEqual(ws["A1"].value, "SUBE")
+        self.assertTrue(ws["B2"].font.b)
+        self.assertEqual([str(r) for r in ws.merged_cells.ranges], ["C1:D2"])
+        self.assertEqual(ws["C1"].value, "TEPSI")
+        self.assertIsInstance(ws["D2"], MergedCell)
+
+
+if __name__ == "__main__":
+    unittest.main()
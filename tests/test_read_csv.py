@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+import parse_gptfix as P
+
+
+HEADER = "Şube Kodu: 123-IZMIR(FORUMAVM)\nSipariş Notu: \nStok Kodu,Miktar,Grup,Birim\n"
+
+
+class ReadCsvTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        P._CSV_CACHE.clear()
+
+    def tearDown(self):
+        P._CSV_CACHE.clear()
+        self.tmp.cleanup()
+
+    def write_csv(self, body: str, name: str = "order.csv") -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(HEADER + body)
+        return path
+
+    def test_order_columns_are_selected(self):
+        path = self.write_csv('"SÜTLÜ DONDURMA (1*3,5 KG)",2,DONDURMA,"KL_3,5_KG"\n')
+        df = P.read_csv(path, usecols=P.order_columns)
+        self.assertEqual(list(df.columns), ["Stok Kodu", "Miktar", "Grup", "Birim"])
+        self.assertEqual(df.loc[0, "Stok Kodu"], "SÜTLÜ DONDURMA (1*3,5 KG)")
+        self.assertEqual(df.loc[0, "Miktar"], 2)
+
+    def test_cached_read_is_not_shared_with_callers(self):
+        path = self.write_csv("KAKAOLU DONDURMA 350 GR,3,DONDURMA,AD\n")
+        first = P.read_csv(path, usecols=P.order_columns)
+        first["_up"] = "X"
+        first.loc[0, "Miktar"] = 99
+        second = P.read_csv(path, usecols=P.order_columns)
+        self.assertNotIn("_up", second.columns)
+        self.assertEqual(second.loc[0, "Miktar"], 3)
+
+    def test_ragged_row_is_rejected(self):
+        # unquoted comma in the product name: one field too many, columns would shift
+        path = self.write_csv(
+            "KAKAOLU DONDURMA 350 GR,3,DONDURMA,AD\n"
+            "DONDURMA SÜTLÜ 3,5 KG,X,2,AD\n"
+        )
+        with self.assertRaises(pd.errors.ParserError):
+            P.read_csv(path, usecols=P.order_columns)
+
+    def test_tatli_flow_rejects_ragged_row(self):
+        path = self.write_csv(
+            "SOGUK BAKLAVA,1,TATLI,TEPSI\n"
+            "TRILEÇE 1,5 KG,2,TATLI,AD\n"
+        )
+        out = os.path.join(self.tmp.name, "sevkiyat_tatlı.xlsx")
+        with self.assertRaises(pd.errors.ParserError):
+            P.process_csv(path, output_path=out)
+        self.assertFalse(os.path.exists(out))
+
+
+if __name__ == "__main__":
+    unittest.main()